@@ -2,16 +2,22 @@ import collections
 import re
 import sys
 
-from .throttle import Throttler  # noqa
+from .throttle import Throttler, ThreadSafeThrottler, OutboundThrottler  # noqa
 from .quotas import ThrottleCapacityQuota, MaxFractionCapacityQuota, ThrottleQuota, RandomRejectThrottleQuota  # noqa
+from .quotas import ThrottleLoadQuota, RandomEarlyDetectionThrottleQuota, MaxFractionDecayedUsageQuota  # noqa
 from .base import ThrottlePriority, ThrottleStats, ThrottleResult  # noqa
-from .metrics import MetricsProvider, NoopMetricsProvider, NOOP_METRICS_PROVIDER  # noqa
+from .base import ThrottleCriticality, ThrottleCriticalityLevels, DEFAULT_CRITICALITY_LEVELS  # noqa
+from .metrics import MetricsProvider, NoopMetricsProvider, NOOP_METRICS_PROVIDER, RenamingMetricsProvider  # noqa
+from .listeners import ThrottleListener  # noqa
+from .asgi import asgi_middleware_factory  # noqa
 
 
 try:
     import aiohttp  # noqa
 
-    from .aiohttp import aiohttp_middleware_factory, aiohttp_ignore  # noqa
+    from .aiohttp import aiohttp_middleware_factory, aiohttp_ignore, aiohttp_drain_on_shutdown  # noqa
+    from .aiohttp import aiohttp_long_lived, aiohttp_on_response_prepare, aiohttp_load_handler  # noqa
+    from .aiohttp import aiohttp_throttled_request  # noqa
 except ImportError:
     pass
 
@@ -22,6 +28,20 @@ try:
 except ImportError:
     pass
 
+try:
+    import grpc  # noqa
+
+    from .grpc import grpc_interceptor_factory  # noqa
+except ImportError:
+    pass
+
+try:
+    import opentelemetry.trace  # noqa
+
+    from .opentelemetry import OPENTELEMETRY_THROTTLE_LISTENER, OpenTelemetryThrottleListener  # noqa
+except ImportError:
+    pass
+
 
 __version__ = "1.6.2"
 
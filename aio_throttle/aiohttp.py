@@ -1,19 +1,29 @@
-from typing import Awaitable, Callable, Set, Optional, List, Any
+import asyncio
+import contextlib
+import random
+from typing import AsyncIterator, Awaitable, Callable, Dict, Set, Optional, List, Any, Tuple, Union
 
 import aiohttp.web
 import aiohttp.web_exceptions
 import aiohttp.web_middlewares
 import aiohttp.web_request
 import aiohttp.web_response
+import yarl
 
-from .base import ThrottlePriority
-from .metrics import MetricsProvider, NOOP_METRICS_PROVIDER
-from .quotas import MaxFractionCapacityQuota, ThrottleCapacityQuota, ThrottleQuota
-from .throttle import Throttler
+from .base import DEFAULT_CRITICALITY_LEVELS, ThrottleCriticalityLevels, ThrottlePriority, ThrottleResult
+from .listeners import ThrottleListener
+from .metrics import MetricsProvider, NOOP_METRICS_PROVIDER, RenamingMetricsProvider
+from .quotas import MaxFractionCapacityQuota, ThrottleCapacityQuota, ThrottleQuota, ThrottleLoadQuota
+from .throttle import OutboundThrottler, Throttler
+from .utils import parse_timeout, retry_after
 
 _HANDLER = Callable[[aiohttp.web_request.Request], Awaitable[aiohttp.web_response.StreamResponse]]
 _MIDDLEWARE = Callable[[aiohttp.web_request.Request, _HANDLER], Awaitable[aiohttp.web_response.StreamResponse]]
 _IGNORE_KEY = "__aio_throttle_ignore__"
+_LONG_LIVED_KEY = "__aio_throttle_long_lived__"
+_THROTTLER_KEY = "__aio_throttle_throttler__"
+_LONG_LIVED_THROTTLER_KEY = "__aio_throttle_long_lived_throttler__"
+_RESPONSE_PREPARE_KEY = "__aio_throttle_response_prepare__"
 
 
 def aiohttp_ignore(func: Optional[Callable[..., Any]] = None) -> Callable[..., Any]:
@@ -24,19 +34,48 @@ def aiohttp_ignore(func: Optional[Callable[..., Any]] = None) -> Callable[..., A
     return wrapper if func is None else wrapper(func)  # type: ignore
 
 
+def aiohttp_long_lived(func: Optional[Callable[..., Any]] = None) -> Callable[..., Any]:
+    def wrapper(f: Callable[..., Any]) -> Callable[..., Any]:
+        setattr(f, _LONG_LIVED_KEY, True)
+        return f
+
+    return wrapper if func is None else wrapper(func)  # type: ignore
+
+
+async def aiohttp_on_response_prepare(
+    request: aiohttp.web_request.Request, response: aiohttp.web_response.StreamResponse
+) -> None:
+    on_response_prepare = request.pop(_RESPONSE_PREPARE_KEY, None)
+    if on_response_prepare is not None:
+        await on_response_prepare(response)
+
+
 def aiohttp_middleware_factory(
     *,
     capacity_limit: int = 128,
     queue_limit: int = 512,
     consumer_quotas: Optional[List[ThrottleCapacityQuota[str]]] = None,
-    priority_quotas: Optional[List[ThrottleCapacityQuota[ThrottlePriority]]] = None,
+    priority_quotas: Optional[List[ThrottleCapacityQuota[str]]] = None,
     quotas: Optional[List[ThrottleQuota]] = None,
+    load_quotas: Optional[List[ThrottleLoadQuota]] = None,
     consumer_header_name: str = "X-Service-Name",
     priority_header_name: str = "X-Request-Priority",
+    timeout_header_name: Optional[str] = None,
     throttled_response_status_code: int = 429,
     throttled_response_reason_header_name: str = "X-Throttled-Reason",
+    throttled_response_retry_after_header_name: Optional[str] = "Retry-After",
+    retry_after_jitter: float = 0.5,
+    max_retry_after: int = 60,
     ignored_paths: Optional[Set[str]] = None,
     metrics_provider: MetricsProvider = NOOP_METRICS_PROVIDER,
+    listeners: Optional[List[ThrottleListener]] = None,
+    warmup_duration: float = 0,
+    warmup_initial_fraction: float = 0.1,
+    warmup_max_latency: Optional[float] = None,
+    long_lived_capacity_limit: Optional[int] = None,
+    long_lived_consumer_quotas: Optional[List[ThrottleCapacityQuota[str]]] = None,
+    criticality_levels: ThrottleCriticalityLevels = DEFAULT_CRITICALITY_LEVELS,
+    load_report_header_name: Optional[str] = None,
 ) -> _MIDDLEWARE:
     throttler = Throttler(
         capacity_limit=capacity_limit,
@@ -45,33 +84,192 @@ def aiohttp_middleware_factory(
         priority_quotas=(
             priority_quotas
             if priority_quotas is not None
-            else [MaxFractionCapacityQuota[ThrottlePriority](0.9, ThrottlePriority.NORMAL)]
+            else [MaxFractionCapacityQuota[str](0.9, ThrottlePriority.NORMAL)]
         ),
         quotas=quotas,
         metrics_provider=metrics_provider,
+        listeners=listeners,
+        load_quotas=load_quotas,
+        warmup_duration=warmup_duration,
+        warmup_initial_fraction=warmup_initial_fraction,
+        warmup_max_latency=warmup_max_latency,
+        criticality_levels=criticality_levels,
+    )
+    long_lived_throttler = (
+        Throttler(
+            capacity_limit=long_lived_capacity_limit,
+            consumer_quotas=long_lived_consumer_quotas,
+            # a separate metric tells rejections of long-lived requests from those of the request capacity
+            metrics_provider=RenamingMetricsProvider(
+                metrics_provider, {"aio_throttle_requests": "aio_throttle_long_lived_requests"}, {}
+            ),
+            listeners=listeners,
+            criticality_levels=criticality_levels,
+        )
+        if long_lived_capacity_limit is not None
+        else None
     )
+    rnd = random.Random()
+
+    def _throttled_response(throttle_result: ThrottleResult, time_to_capacity: float) -> aiohttp.web_response.Response:
+        headers = {throttled_response_reason_header_name: str(throttle_result)}
+        # drained requests should be retried elsewhere at once
+        if (
+            throttled_response_retry_after_header_name is not None
+            and throttle_result != ThrottleResult.REJECTED_DUE_TO_DRAIN
+        ):
+            headers[throttled_response_retry_after_header_name] = str(
+                retry_after(throttle_result, time_to_capacity, retry_after_jitter, max_retry_after, rnd)
+            )
+        return aiohttp.web_response.Response(status=throttled_response_status_code, headers=headers)
 
     @aiohttp.web_middlewares.middleware
     async def _throttling_middleware(
         request: aiohttp.web_request.Request, handler: _HANDLER
     ) -> aiohttp.web_response.StreamResponse:
+        response = await _throttle(request, handler)
+        if load_report_header_name is not None and not response.prepared:
+            response.headers[load_report_header_name] = ", ".join(
+                f"{name}={value}" for name, value in _load_report(throttler, long_lived_throttler).items()
+            )
+        return response
+
+    async def _throttle(request: aiohttp.web_request.Request, handler: _HANDLER) -> aiohttp.web_response.StreamResponse:
         if _is_ignored_by_decorator(request) or _is_ignored_by_path(request, ignored_paths):
             return await handler(request)
 
         consumer = request.headers.get(consumer_header_name, "unknown").lower()
-        priority = ThrottlePriority.parse(request.headers.get(priority_header_name))
-        async with throttler.throttle(consumer=consumer, priority=priority) as throttle_result:
-            if throttle_result:
-                return await handler(request)
+        priority = criticality_levels.parse(request.headers.get(priority_header_name))
+        timeout = parse_timeout(request.headers.get(timeout_header_name)) if timeout_header_name is not None else None
+        if long_lived_throttler is None:
+            async with throttler.throttle(consumer=consumer, priority=priority, timeout=timeout) as throttle_result:
+                if throttle_result:
+                    return await handler(request)
+                return _throttled_response(throttle_result, throttler.estimated_time_to_capacity)
 
-            return aiohttp.web_response.Response(
-                status=throttled_response_status_code,
-                headers={throttled_response_reason_header_name: str(throttle_result)},
+        # long-lived handlers are admitted by a separate throttler and release the request capacity slot
+        # once their response is prepared, see aiohttp_on_response_prepare
+        long_lived = _is_long_lived_by_decorator(request)
+        stack = contextlib.AsyncExitStack()
+        try:
+            if long_lived:
+                long_lived_result = await stack.enter_async_context(
+                    long_lived_throttler.throttle(consumer=consumer, priority=priority, long_lived=True)
+                )
+                if not long_lived_result:
+                    return _throttled_response(long_lived_result, long_lived_throttler.estimated_time_to_capacity)
+
+            request_stack = contextlib.AsyncExitStack()
+            stack.push_async_exit(request_stack)
+            throttle_result = await request_stack.enter_async_context(
+                throttler.throttle(consumer=consumer, priority=priority, timeout=timeout)
             )
+            if not throttle_result:
+                return _throttled_response(throttle_result, throttler.estimated_time_to_capacity)
+
+            async def _on_response_prepare(response: aiohttp.web_response.StreamResponse) -> None:
+                if not long_lived:
+                    if long_lived_throttler is None or not _is_long_lived_response(response):
+                        return
+                    long_lived_result = await stack.enter_async_context(
+                        long_lived_throttler.throttle(consumer=consumer, priority=priority, long_lived=True)
+                    )
+                    if not long_lived_result:
+                        return
+                await request_stack.aclose()
 
+            request[_RESPONSE_PREPARE_KEY] = _on_response_prepare
+            try:
+                return await handler(request)
+            finally:
+                request.pop(_RESPONSE_PREPARE_KEY, None)
+        finally:
+            await stack.aclose()
+
+    setattr(_throttling_middleware, _THROTTLER_KEY, throttler)
+    setattr(_throttling_middleware, _LONG_LIVED_THROTTLER_KEY, long_lived_throttler)
     return _throttling_middleware
 
 
+def aiohttp_drain_on_shutdown(
+    middleware: _MIDDLEWARE, timeout: Optional[float] = 30
+) -> Callable[[aiohttp.web.Application], Awaitable[None]]:
+    throttler: Throttler = getattr(middleware, _THROTTLER_KEY)
+    long_lived_throttler: Optional[Throttler] = getattr(middleware, _LONG_LIVED_THROTTLER_KEY)
+
+    async def _drain(_: aiohttp.web.Application) -> None:
+        if long_lived_throttler is None:
+            await throttler.drain(timeout)
+        else:
+            await asyncio.gather(throttler.drain(timeout), long_lived_throttler.drain(timeout))
+
+    return _drain
+
+
+def aiohttp_load_handler(middleware: _MIDDLEWARE) -> _HANDLER:
+    throttler: Throttler = getattr(middleware, _THROTTLER_KEY)
+    long_lived_throttler: Optional[Throttler] = getattr(middleware, _LONG_LIVED_THROTTLER_KEY)
+
+    @aiohttp_ignore
+    async def _load(_: aiohttp.web_request.Request) -> aiohttp.web_response.StreamResponse:
+        return aiohttp.web.json_response(_load_report(throttler, long_lived_throttler))
+
+    return _load
+
+
+@contextlib.asynccontextmanager
+async def aiohttp_throttled_request(
+    throttler: OutboundThrottler,
+    session: aiohttp.ClientSession,
+    method: str,
+    url: Union[str, yarl.URL],
+    *,
+    priority: Optional[Union[str, int]] = None,
+    timeout: Optional[float] = None,
+    **kwargs: Any,
+) -> AsyncIterator[Tuple[ThrottleResult, Optional[aiohttp.ClientResponse]]]:
+    url = yarl.URL(url)
+    async with throttler.throttle(str(url.origin()), priority=priority, timeout=timeout) as throttle_result:
+        if not throttle_result:
+            yield throttle_result, None
+            return
+        async with session.request(method, url, **kwargs) as response:
+            yield throttle_result, response
+
+
+def _load_report(throttler: Throttler, long_lived_throttler: Optional[Throttler]) -> Dict[str, Union[int, float]]:
+    report: Dict[str, Union[int, float]] = {
+        "utilization": _utilization(throttler),
+        "queue_size": throttler.stats.queue_size,
+        "rejection_rate": round(throttler.rejection_rate, 3),
+    }
+    if long_lived_throttler is not None:
+        report["long_lived_utilization"] = _utilization(long_lived_throttler)
+        report["long_lived_rejection_rate"] = round(long_lived_throttler.rejection_rate, 3)
+    return report
+
+
+def _utilization(throttler: Throttler) -> float:
+    stats = throttler.stats
+    return round((stats.capacity_limit - stats.available_capacity) / stats.capacity_limit, 3)
+
+
+def _is_long_lived_by_decorator(request: aiohttp.web_request.Request) -> bool:
+    handler = request.match_info.handler
+    long_lived = getattr(handler, _LONG_LIVED_KEY, False)
+    if not long_lived and _is_subclass(handler, aiohttp.web.View):
+        method_handler = getattr(handler, request.method.lower(), None)
+        if method_handler is not None:
+            long_lived = getattr(method_handler, _LONG_LIVED_KEY, False)
+    return bool(long_lived)
+
+
+def _is_long_lived_response(response: aiohttp.web_response.StreamResponse) -> bool:
+    return isinstance(response, aiohttp.web.WebSocketResponse) or not isinstance(
+        response, aiohttp.web_response.Response
+    )
+
+
 def _is_ignored_by_decorator(request: aiohttp.web_request.Request) -> bool:
     handler = request.match_info.handler
     ignored = getattr(handler, _IGNORE_KEY, False)
@@ -0,0 +1,118 @@
+import random
+from typing import Any, Awaitable, Callable, Iterable, List, MutableMapping, Optional, Set, Tuple
+
+from .base import DEFAULT_CRITICALITY_LEVELS, ThrottleCriticalityLevels, ThrottlePriority, ThrottleResult
+from .listeners import ThrottleListener
+from .metrics import MetricsProvider, NOOP_METRICS_PROVIDER
+from .quotas import MaxFractionCapacityQuota, ThrottleCapacityQuota, ThrottleQuota, ThrottleLoadQuota
+from .throttle import Throttler
+from .utils import parse_timeout, retry_after
+
+_SCOPE = MutableMapping[str, Any]
+_MESSAGE = MutableMapping[str, Any]
+_RECEIVE = Callable[[], Awaitable[_MESSAGE]]
+_SEND = Callable[[_MESSAGE], Awaitable[None]]
+_APP = Callable[[_SCOPE, _RECEIVE, _SEND], Awaitable[None]]
+
+
+def asgi_middleware_factory(
+    app: _APP,
+    *,
+    capacity_limit: int = 128,
+    queue_limit: int = 512,
+    consumer_quotas: Optional[List[ThrottleCapacityQuota[str]]] = None,
+    priority_quotas: Optional[List[ThrottleCapacityQuota[str]]] = None,
+    quotas: Optional[List[ThrottleQuota]] = None,
+    load_quotas: Optional[List[ThrottleLoadQuota]] = None,
+    consumer_header_name: str = "X-Service-Name",
+    priority_header_name: str = "X-Request-Priority",
+    timeout_header_name: Optional[str] = None,
+    throttled_response_status_code: int = 429,
+    throttled_response_reason_header_name: str = "X-Throttled-Reason",
+    throttled_response_retry_after_header_name: Optional[str] = "Retry-After",
+    retry_after_jitter: float = 0.5,
+    max_retry_after: int = 60,
+    ignored_paths: Optional[Set[str]] = None,
+    metrics_provider: MetricsProvider = NOOP_METRICS_PROVIDER,
+    listeners: Optional[List[ThrottleListener]] = None,
+    warmup_duration: float = 0,
+    warmup_initial_fraction: float = 0.1,
+    warmup_max_latency: Optional[float] = None,
+    criticality_levels: ThrottleCriticalityLevels = DEFAULT_CRITICALITY_LEVELS,
+) -> _APP:
+    throttler = Throttler(
+        capacity_limit=capacity_limit,
+        queue_limit=queue_limit,
+        consumer_quotas=(consumer_quotas if consumer_quotas is not None else [MaxFractionCapacityQuota[str](0.7)]),
+        priority_quotas=(
+            priority_quotas
+            if priority_quotas is not None
+            else [MaxFractionCapacityQuota[str](0.9, ThrottlePriority.NORMAL)]
+        ),
+        quotas=quotas,
+        metrics_provider=metrics_provider,
+        listeners=listeners,
+        load_quotas=load_quotas,
+        warmup_duration=warmup_duration,
+        warmup_initial_fraction=warmup_initial_fraction,
+        warmup_max_latency=warmup_max_latency,
+        criticality_levels=criticality_levels,
+    )
+    # ASGI servers pass header names lowercased
+    consumer_header = consumer_header_name.lower().encode("latin-1")
+    priority_header = priority_header_name.lower().encode("latin-1")
+    timeout_header = timeout_header_name.lower().encode("latin-1") if timeout_header_name is not None else None
+    reason_header = throttled_response_reason_header_name.lower().encode("latin-1")
+    retry_after_header = (
+        throttled_response_retry_after_header_name.lower().encode("latin-1")
+        if throttled_response_retry_after_header_name is not None
+        else None
+    )
+    rnd = random.Random()
+
+    async def _throttled_response(send: _SEND, throttle_result: ThrottleResult) -> None:
+        headers = [(reason_header, str(throttle_result).encode("latin-1"))]
+        # drained requests should be retried elsewhere at once
+        if retry_after_header is not None and throttle_result != ThrottleResult.REJECTED_DUE_TO_DRAIN:
+            value = retry_after(
+                throttle_result, throttler.estimated_time_to_capacity, retry_after_jitter, max_retry_after, rnd
+            )
+            headers.append((retry_after_header, str(value).encode("latin-1")))
+        headers.append((b"content-length", b"0"))
+        await send({"type": "http.response.start", "status": throttled_response_status_code, "headers": headers})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def _throttling_middleware(scope: _SCOPE, receive: _RECEIVE, send: _SEND) -> None:
+        if scope["type"] != "http" or (ignored_paths is not None and scope["path"] in ignored_paths):
+            await app(scope, receive, send)
+            return
+
+        consumer, priority, timeout = _parse_headers(scope["headers"], consumer_header, priority_header, timeout_header)
+        async with throttler.throttle(
+            consumer=consumer.lower() if consumer is not None else "unknown",
+            priority=criticality_levels.parse(priority),
+            timeout=parse_timeout(timeout),
+        ) as throttle_result:
+            if throttle_result:
+                await app(scope, receive, send)
+            else:
+                await _throttled_response(send, throttle_result)
+
+    return _throttling_middleware
+
+
+def _parse_headers(
+    headers: Iterable[Tuple[bytes, bytes]],
+    consumer_header: bytes,
+    priority_header: bytes,
+    timeout_header: Optional[bytes],
+) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+    consumer, priority, timeout = None, None, None
+    for name, value in headers:
+        if name == consumer_header:
+            consumer = value.decode("latin-1")
+        elif name == priority_header:
+            priority = value.decode("latin-1")
+        elif name == timeout_header:
+            timeout = value.decode("latin-1")
+    return consumer, priority, timeout
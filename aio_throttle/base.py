@@ -1,6 +1,6 @@
 import dataclasses
 import enum
-from typing import Optional, Mapping
+from typing import Dict, Mapping, Optional, Sequence, Union
 
 
 class ThrottlePriority(str, enum.Enum):
@@ -21,12 +21,72 @@ class ThrottlePriority(str, enum.Enum):
             return ThrottlePriority.NORMAL
 
 
+@dataclasses.dataclass(frozen=True)
+class ThrottleCriticality:
+    name: str
+    queue_fraction: float = 1.0
+    capacity_fraction: float = 1.0
+
+    def __post_init__(self) -> None:
+        if self.queue_fraction < 0 or self.queue_fraction > 1:
+            raise ValueError("ThrottleCriticality queue_fraction value must be in range [0, 1]")
+        if self.capacity_fraction < 0 or self.capacity_fraction > 1:
+            raise ValueError("ThrottleCriticality capacity_fraction value must be in range [0, 1]")
+
+
+class ThrottleCriticalityLevels:
+    __slots__ = ("_levels", "_indexes", "_default_index")
+
+    def __init__(self, levels: Sequence[ThrottleCriticality], default: str):
+        if not levels:
+            raise ValueError("ThrottleCriticalityLevels levels must not be empty")
+
+        self._levels = tuple(levels)
+        self._indexes: Dict[str, int] = {}
+        for index, level in enumerate(self._levels):
+            name = level.name.lower()
+            if name in self._indexes:
+                raise ValueError(f"ThrottleCriticalityLevels level {level.name} is duplicated")
+            self._indexes[name] = index
+        if default.lower() not in self._indexes:
+            raise ValueError(f"ThrottleCriticalityLevels default level {default} is unknown")
+        self._default_index = self._indexes[default.lower()]
+
+    def __len__(self) -> int:
+        return len(self._levels)
+
+    def __getitem__(self, index: int) -> ThrottleCriticality:
+        return self._levels[index]
+
+    def parse(self, value: Optional[Union[str, int]]) -> int:
+        if isinstance(value, int):
+            if value < 0 or value >= len(self._levels):
+                raise ValueError(f"ThrottleCriticalityLevels index value must be in range [0, {len(self._levels)})")
+            return value
+        if value is None:
+            return self._default_index
+        return self._indexes.get(value.lower(), self._default_index)
+
+
+# levels go from the most critical to the least critical one, the defaults mirror ThrottlePriority
+DEFAULT_CRITICALITY_LEVELS = ThrottleCriticalityLevels(
+    [
+        ThrottleCriticality(ThrottlePriority.HIGH),
+        ThrottleCriticality(ThrottlePriority.NORMAL),
+        ThrottleCriticality(ThrottlePriority.LOW, queue_fraction=0),
+    ],
+    default=ThrottlePriority.NORMAL,
+)
+
+
 class ThrottleResult(str, enum.Enum):
     ACCEPTED = "accepted"
     REJECTED_DUE_TO_FULL_QUEUE = "rejected due to full queue"
     REJECTED_DUE_TO_PRIORITY_QUOTA = "rejected due to priority quota"
     REJECTED_DUE_TO_CONSUMER_QUOTA = "rejected due to consumer quota"
     REJECTED_DUE_TO_QUOTA = "rejected due to quota"
+    REJECTED_DUE_TO_DEADLINE = "rejected due to deadline"
+    REJECTED_DUE_TO_DRAIN = "rejected due to drain"
 
     def __bool__(self) -> bool:
         return self == self.ACCEPTED
@@ -51,4 +111,4 @@ class ThrottleStats:
     queue_size: int
     queue_limit: int
     consumers_used_capacity: Mapping[str, int]
-    priorities_used_capacity: Mapping[ThrottlePriority, int]
+    priorities_used_capacity: Mapping[str, int]
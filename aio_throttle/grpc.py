@@ -0,0 +1,199 @@
+import inspect
+from typing import Any, AsyncIterator, Awaitable, Callable, List, Optional, Set
+
+import grpc
+import grpc.aio
+
+from .base import DEFAULT_CRITICALITY_LEVELS, ThrottleCriticalityLevels, ThrottlePriority, ThrottleResult
+from .listeners import ThrottleListener
+from .metrics import MetricsProvider, NOOP_METRICS_PROVIDER
+from .quotas import MaxFractionCapacityQuota, ThrottleCapacityQuota, ThrottleQuota, ThrottleLoadQuota
+from .throttle import Throttler
+
+
+def grpc_interceptor_factory(
+    *,
+    capacity_limit: int = 128,
+    queue_limit: int = 512,
+    consumer_quotas: Optional[List[ThrottleCapacityQuota[str]]] = None,
+    priority_quotas: Optional[List[ThrottleCapacityQuota[str]]] = None,
+    quotas: Optional[List[ThrottleQuota]] = None,
+    load_quotas: Optional[List[ThrottleLoadQuota]] = None,
+    consumer_metadata_key: str = "x-service-name",
+    priority_metadata_key: str = "x-request-priority",
+    throttled_reason_metadata_key: str = "x-throttled-reason",
+    ignored_methods: Optional[Set[str]] = None,
+    deadline_admission: bool = False,
+    metrics_provider: MetricsProvider = NOOP_METRICS_PROVIDER,
+    listeners: Optional[List[ThrottleListener]] = None,
+    warmup_duration: float = 0,
+    warmup_initial_fraction: float = 0.1,
+    warmup_max_latency: Optional[float] = None,
+    criticality_levels: ThrottleCriticalityLevels = DEFAULT_CRITICALITY_LEVELS,
+    streaming_capacity_limit: Optional[int] = None,
+    streaming_consumer_quotas: Optional[List[ThrottleCapacityQuota[str]]] = None,
+) -> grpc.aio.ServerInterceptor:
+    throttler = Throttler(
+        capacity_limit=capacity_limit,
+        queue_limit=queue_limit,
+        consumer_quotas=(consumer_quotas if consumer_quotas is not None else [MaxFractionCapacityQuota[str](0.7)]),
+        priority_quotas=(
+            priority_quotas
+            if priority_quotas is not None
+            else [MaxFractionCapacityQuota[str](0.9, ThrottlePriority.NORMAL)]
+        ),
+        quotas=quotas,
+        metrics_provider=metrics_provider,
+        listeners=listeners,
+        load_quotas=load_quotas,
+        warmup_duration=warmup_duration,
+        warmup_initial_fraction=warmup_initial_fraction,
+        warmup_max_latency=warmup_max_latency,
+        criticality_levels=criticality_levels,
+    )
+    # streaming calls hold their slot until the stream ends, so they can be admitted by a separate throttler
+    streaming_throttler = (
+        Throttler(
+            capacity_limit=streaming_capacity_limit,
+            consumer_quotas=streaming_consumer_quotas,
+            metrics_provider=metrics_provider,
+            criticality_levels=criticality_levels,
+        )
+        if streaming_capacity_limit is not None
+        else None
+    )
+    return _ThrottlingInterceptor(
+        throttler,
+        streaming_throttler,
+        consumer_metadata_key.lower(),
+        priority_metadata_key.lower(),
+        throttled_reason_metadata_key.lower(),
+        ignored_methods,
+        deadline_admission,
+        criticality_levels,
+    )
+
+
+class _ThrottlingInterceptor(grpc.aio.ServerInterceptor):  # type: ignore[misc]
+    __slots__ = (
+        "_throttler",
+        "_streaming_throttler",
+        "_consumer_metadata_key",
+        "_priority_metadata_key",
+        "_throttled_reason_metadata_key",
+        "_ignored_methods",
+        "_deadline_admission",
+        "_levels",
+    )
+
+    def __init__(
+        self,
+        throttler: Throttler,
+        streaming_throttler: Optional[Throttler],
+        consumer_metadata_key: str,
+        priority_metadata_key: str,
+        throttled_reason_metadata_key: str,
+        ignored_methods: Optional[Set[str]],
+        deadline_admission: bool,
+        criticality_levels: ThrottleCriticalityLevels,
+    ):
+        self._throttler = throttler
+        self._streaming_throttler = streaming_throttler
+        self._consumer_metadata_key = consumer_metadata_key
+        self._priority_metadata_key = priority_metadata_key
+        self._throttled_reason_metadata_key = throttled_reason_metadata_key
+        self._ignored_methods = ignored_methods
+        self._deadline_admission = deadline_admission
+        self._levels = criticality_levels
+
+    async def intercept_service(
+        self,
+        continuation: Callable[[grpc.HandlerCallDetails], Awaitable[grpc.RpcMethodHandler]],
+        handler_call_details: grpc.HandlerCallDetails,
+    ) -> grpc.RpcMethodHandler:
+        handler = await continuation(handler_call_details)
+        if handler is None:
+            return handler
+        if self._ignored_methods is not None and handler_call_details.method in self._ignored_methods:
+            return handler
+
+        consumer, priority = "unknown", None
+        for key, value in handler_call_details.invocation_metadata or ():
+            if key == self._consumer_metadata_key:
+                consumer = value.lower()
+            elif key == self._priority_metadata_key:
+                priority = value
+        level = self._levels.parse(priority)
+
+        if handler.unary_unary is not None:
+            return grpc.unary_unary_rpc_method_handler(
+                self._wrap_unary_response(
+                    handler.unary_unary, self._throttler, consumer, level, self._deadline_admission, False
+                ),
+                request_deserializer=handler.request_deserializer,
+                response_serializer=handler.response_serializer,
+            )
+        # streams last as long as clients keep them open, so their deadlines are not used for admission
+        # and their hold times are not taken as service times
+        throttler = self._streaming_throttler if self._streaming_throttler is not None else self._throttler
+        if handler.stream_unary is not None:
+            return grpc.stream_unary_rpc_method_handler(
+                self._wrap_unary_response(handler.stream_unary, throttler, consumer, level, False, True),
+                request_deserializer=handler.request_deserializer,
+                response_serializer=handler.response_serializer,
+            )
+        if handler.unary_stream is not None:
+            return grpc.unary_stream_rpc_method_handler(
+                self._wrap_stream_response(handler.unary_stream, throttler, consumer, level),
+                request_deserializer=handler.request_deserializer,
+                response_serializer=handler.response_serializer,
+            )
+        return grpc.stream_stream_rpc_method_handler(
+            self._wrap_stream_response(handler.stream_stream, throttler, consumer, level),
+            request_deserializer=handler.request_deserializer,
+            response_serializer=handler.response_serializer,
+        )
+
+    def _wrap_unary_response(
+        self,
+        behavior: Callable[[Any, grpc.aio.ServicerContext], Any],
+        throttler: Throttler,
+        consumer: str,
+        level: int,
+        deadline_admission: bool,
+        long_lived: bool,
+    ) -> Callable[[Any, grpc.aio.ServicerContext], Awaitable[Any]]:
+        async def _behavior(request: Any, context: grpc.aio.ServicerContext) -> Any:
+            timeout = context.time_remaining() if deadline_admission else None
+            async with throttler.throttle(
+                consumer=consumer, priority=level, timeout=timeout, long_lived=long_lived
+            ) as throttle_result:
+                if not throttle_result:
+                    await self._abort(context, throttle_result)
+                return await behavior(request, context)
+
+        return _behavior
+
+    def _wrap_stream_response(
+        self, behavior: Callable[[Any, grpc.aio.ServicerContext], Any], throttler: Throttler, consumer: str, level: int
+    ) -> Callable[[Any, grpc.aio.ServicerContext], AsyncIterator[Any]]:
+        async def _behavior(request: Any, context: grpc.aio.ServicerContext) -> AsyncIterator[Any]:
+            async with throttler.throttle(consumer=consumer, priority=level, long_lived=True) as throttle_result:
+                if not throttle_result:
+                    await self._abort(context, throttle_result)
+                responses = behavior(request, context)
+                # a streaming handler either yields responses or writes them to the context
+                if inspect.isasyncgen(responses):
+                    async for response in responses:
+                        yield response
+                else:
+                    await responses
+
+        return _behavior
+
+    async def _abort(self, context: grpc.aio.ServicerContext, throttle_result: ThrottleResult) -> None:
+        await context.abort(
+            grpc.StatusCode.RESOURCE_EXHAUSTED,
+            str(throttle_result),
+            trailing_metadata=((self._throttled_reason_metadata_key, str(throttle_result)),),
+        )
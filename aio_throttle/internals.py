@@ -1,10 +1,11 @@
 import asyncio
+import threading
 
-from typing import List
+from typing import List, Tuple
 
 
 class LifoSemaphore:
-    __slots__ = ("_limit", "_available", "_waiters", "_loop")
+    __slots__ = ("_limit", "_available", "_waiters", "_closed")
 
     def __init__(self, initial: int = 1) -> None:
         if initial < 1:
@@ -12,7 +13,7 @@ class LifoSemaphore:
         self._limit = initial
         self._available = initial
         self._waiters: List[asyncio.Future[None]] = []
-        self._loop = asyncio.get_event_loop()
+        self._closed = False
 
     def _wake_up_next(self) -> None:
         while self._waiters:
@@ -21,6 +22,10 @@ class LifoSemaphore:
                 waiter.set_result(None)
                 return
 
+    @property
+    def limit(self) -> int:
+        return self._limit
+
     @property
     def available(self) -> int:
         return self._available
@@ -36,22 +41,130 @@ class LifoSemaphore:
         self._available -= 1
         return True
 
-    async def acquire(self) -> None:
-        while self._available <= 0:
-            future = self._loop.create_future()
+    async def acquire(self) -> bool:
+        while self._available <= 0 or self._closed:
+            if self._closed:
+                return False
+            future = asyncio.get_running_loop().create_future()
             self._waiters.append(future)
             try:
                 await future
             except:  # noqa
                 future.cancel()
+                if future in self._waiters:
+                    self._waiters.remove(future)
                 if self._available > 0 and not future.cancelled():
                     self._wake_up_next()
                 raise
         self._available -= 1
-        return
+        return True
 
     def release(self) -> None:
         if self._available >= self._limit:
             raise ValueError("LifoSemaphore released too many times")
         self._available += 1
         self._wake_up_next()
+
+    def resize(self, limit: int) -> None:
+        if limit < 1:
+            raise ValueError("LifoSemaphore limit must be >= 1")
+        delta = limit - self._limit
+        self._limit = limit
+        self._available += delta
+        for _ in range(0, min(delta, len(self._waiters))):
+            self._wake_up_next()
+
+    def close(self) -> None:
+        self._closed = True
+        while self._waiters:
+            waiter = self._waiters.pop()
+            if not waiter.done():
+                waiter.set_result(None)
+
+
+class ThreadSafeLifoSemaphore(LifoSemaphore):
+    __slots__ = ("_lock", "_loop_waiters")
+
+    def __init__(self, initial: int = 1) -> None:
+        super().__init__(initial)
+        self._lock = threading.Lock()
+        self._loop_waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future[bool]]] = []
+
+    @property
+    def waiting(self) -> int:
+        return len(self._loop_waiters)
+
+    def acquire_no_wait(self) -> bool:
+        with self._lock:
+            return super().acquire_no_wait()
+
+    async def acquire(self) -> bool:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._closed:
+                return False
+            if self._available > 0:
+                self._available -= 1
+                return True
+            waiter: Tuple[asyncio.AbstractEventLoop, asyncio.Future[bool]] = (loop, loop.create_future())
+            self._loop_waiters.append(waiter)
+        try:
+            return await waiter[1]
+        except:  # noqa
+            with self._lock:
+                if waiter in self._loop_waiters:
+                    self._loop_waiters.remove(waiter)
+                    raise
+            # the slot has already been handed over to this waiter, so pass it on
+            if waiter[1].done() and not waiter[1].cancelled() and waiter[1].result():
+                self.release()
+            raise
+
+    def release(self) -> None:
+        with self._lock:
+            while self._loop_waiters:
+                loop, future = self._loop_waiters.pop()
+                try:
+                    loop.call_soon_threadsafe(self._hand_over, future)
+                    return
+                except RuntimeError:  # the loop of the waiter is closed
+                    continue
+            if self._available >= self._limit:
+                raise ValueError("LifoSemaphore released too many times")
+            self._available += 1
+
+    def resize(self, limit: int) -> None:
+        if limit < 1:
+            raise ValueError("LifoSemaphore limit must be >= 1")
+        with self._lock:
+            delta = limit - self._limit
+            self._limit = limit
+            self._available += delta
+            while self._available > 0 and self._loop_waiters:
+                loop, future = self._loop_waiters.pop()
+                try:
+                    loop.call_soon_threadsafe(self._hand_over, future)
+                    self._available -= 1
+                except RuntimeError:  # the loop of the waiter is closed
+                    continue
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            while self._loop_waiters:
+                loop, future = self._loop_waiters.pop()
+                try:
+                    loop.call_soon_threadsafe(_set_result_if_not_done, future, False)
+                except RuntimeError:  # the loop of the waiter is closed
+                    continue
+
+    def _hand_over(self, future: "asyncio.Future[bool]") -> None:
+        if future.done():
+            self.release()
+        else:
+            future.set_result(True)
+
+
+def _set_result_if_not_done(future: "asyncio.Future[bool]", result: bool) -> None:
+    if not future.done():
+        future.set_result(result)
@@ -0,0 +1,50 @@
+from typing import List, Optional
+
+from .base import ThrottleResult
+
+
+class ThrottleListener:
+    __slots__ = ()
+
+    def on_enqueued(self, consumer: Optional[str], priority: Optional[str]) -> None:
+        pass
+
+    def on_acquired(self, consumer: Optional[str], priority: Optional[str], wait_time: float) -> None:
+        pass
+
+    def on_released(self, consumer: Optional[str], priority: Optional[str], hold_time: float) -> None:
+        pass
+
+    def on_rejected(self, consumer: Optional[str], priority: Optional[str], result: ThrottleResult) -> None:
+        pass
+
+
+class CompositeThrottleListener(ThrottleListener):
+    __slots__ = ("_listeners",)
+
+    def __init__(self, listeners: List[ThrottleListener]):
+        self._listeners = listeners
+
+    def on_enqueued(self, consumer: Optional[str], priority: Optional[str]) -> None:
+        for listener in self._listeners:
+            listener.on_enqueued(consumer, priority)
+
+    def on_acquired(self, consumer: Optional[str], priority: Optional[str], wait_time: float) -> None:
+        for listener in self._listeners:
+            listener.on_acquired(consumer, priority, wait_time)
+
+    def on_released(self, consumer: Optional[str], priority: Optional[str], hold_time: float) -> None:
+        for listener in self._listeners:
+            listener.on_released(consumer, priority, hold_time)
+
+    def on_rejected(self, consumer: Optional[str], priority: Optional[str], result: ThrottleResult) -> None:
+        for listener in self._listeners:
+            listener.on_rejected(consumer, priority, result)
+
+
+def create_listener(listeners: Optional[List[ThrottleListener]]) -> Optional[ThrottleListener]:
+    if not listeners:
+        return None
+    if len(listeners) == 1:
+        return listeners[0]
+    return CompositeThrottleListener(listeners)
@@ -18,3 +18,17 @@ class NoopMetricsProvider(MetricsProvider):
 
 
 NOOP_METRICS_PROVIDER = NoopMetricsProvider()
+
+
+class RenamingMetricsProvider(MetricsProvider):
+    __slots__ = ("_metrics_provider", "_names", "_tag_names")
+
+    def __init__(self, metrics_provider: MetricsProvider, names: Dict[str, str], tag_names: Dict[str, str]) -> None:
+        self._metrics_provider = metrics_provider
+        self._names = names
+        self._tag_names = tag_names
+
+    def increment_counter(self, name: str, tags: Dict[str, str], value: float = 1) -> None:
+        self._metrics_provider.increment_counter(
+            self._names.get(name, name), {self._tag_names.get(tag, tag): tags[tag] for tag in tags}, value
+        )
@@ -0,0 +1,48 @@
+from typing import Dict, Optional, Union
+
+import opentelemetry.trace
+
+from .base import ThrottleResult
+from .listeners import ThrottleListener
+
+
+class OpenTelemetryThrottleListener(ThrottleListener):
+    __slots__ = ()
+
+    def on_enqueued(self, consumer: Optional[str], priority: Optional[str]) -> None:
+        span = opentelemetry.trace.get_current_span()
+        if span.is_recording():
+            span.add_event("aio_throttle.enqueued", _attributes(consumer, priority))
+
+    def on_acquired(self, consumer: Optional[str], priority: Optional[str], wait_time: float) -> None:
+        span = opentelemetry.trace.get_current_span()
+        if span.is_recording():
+            attributes = _attributes(consumer, priority)
+            attributes["aio_throttle.wait_time"] = wait_time
+            span.add_event("aio_throttle.acquired", attributes)
+
+    def on_released(self, consumer: Optional[str], priority: Optional[str], hold_time: float) -> None:
+        span = opentelemetry.trace.get_current_span()
+        if span.is_recording():
+            attributes = _attributes(consumer, priority)
+            attributes["aio_throttle.hold_time"] = hold_time
+            span.add_event("aio_throttle.released", attributes)
+
+    def on_rejected(self, consumer: Optional[str], priority: Optional[str], result: ThrottleResult) -> None:
+        span = opentelemetry.trace.get_current_span()
+        if span.is_recording():
+            attributes = _attributes(consumer, priority)
+            attributes["aio_throttle.result"] = str(result)
+            span.add_event("aio_throttle.rejected", attributes)
+
+
+def _attributes(consumer: Optional[str], priority: Optional[str]) -> Dict[str, Union[str, float]]:
+    attributes: Dict[str, Union[str, float]] = {}
+    if consumer is not None:
+        attributes["aio_throttle.consumer"] = consumer
+    if priority is not None:
+        attributes["aio_throttle.priority"] = str(priority)
+    return attributes
+
+
+OPENTELEMETRY_THROTTLE_LISTENER = OpenTelemetryThrottleListener()
@@ -1,9 +1,13 @@
 import abc
+import math
 import random
-from typing import TypeVar, Generic, List, Optional, Any
+import time
+from typing import TypeVar, Generic, List, Optional, Any, Mapping, Callable, Dict, Tuple
 
 TResource = TypeVar("TResource")
 
+_MIN_DECAYED_USAGE = 1e-3
+
 
 class ThrottleCapacityQuota(Generic[TResource]):
     __slots__ = ()
@@ -12,6 +16,9 @@ class ThrottleCapacityQuota(Generic[TResource]):
     def can_be_accepted(self, resource: TResource, capacity_used: int, capacity_limit: int) -> bool:
         ...
 
+    def on_released(self, resource: TResource, hold_time: float) -> None:
+        pass
+
 
 class CompositeThrottleCapacityQuota(ThrottleCapacityQuota[TResource]):
     __slots__ = ("_quotas",)
@@ -25,6 +32,10 @@ class CompositeThrottleCapacityQuota(ThrottleCapacityQuota[TResource]):
                 return False
         return True
 
+    def on_released(self, resource: TResource, hold_time: float) -> None:
+        for quota in self._quotas:
+            quota.on_released(resource, hold_time)
+
 
 class MaxFractionCapacityQuota(ThrottleCapacityQuota[TResource]):
     __slots__ = ("_max_fraction", "_matched_resource")
@@ -42,6 +53,54 @@ class MaxFractionCapacityQuota(ThrottleCapacityQuota[TResource]):
         return (used_capacity * 1.0 / capacity_limit) <= self._max_fraction
 
 
+class MaxFractionDecayedUsageQuota(ThrottleCapacityQuota[TResource]):
+    __slots__ = ("_max_fraction", "_matched_resource", "_decay_rate", "_clock", "_usages", "_released_since_eviction")
+
+    def __init__(
+        self,
+        max_fraction: float,
+        half_life: float,
+        resource: Optional[TResource] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if max_fraction < 0 or max_fraction > 1:
+            raise ValueError("MaxFractionDecayedUsageQuota max_fraction value must be in range [0, 1]")
+        if half_life <= 0:
+            raise ValueError("MaxFractionDecayedUsageQuota half_life value must be > 0")
+
+        self._max_fraction = max_fraction
+        self._matched_resource = resource
+        self._decay_rate = math.log(2) / half_life
+        self._clock = clock
+        self._usages: Dict[TResource, Tuple[float, float]] = {}
+        self._released_since_eviction = 0
+
+    def can_be_accepted(self, resource: TResource, used_capacity: int, capacity_limit: int) -> bool:
+        if self._matched_resource is not None and resource != self._matched_resource:
+            return True
+        # capacity_limit / decay_rate is the decayed capacity-time of the whole throttler
+        return self._decayed_usage(resource, self._clock()) * self._decay_rate / capacity_limit <= self._max_fraction
+
+    def on_released(self, resource: TResource, hold_time: float) -> None:
+        if self._matched_resource is not None and resource != self._matched_resource:
+            return
+        now = self._clock()
+        self._usages[resource] = (self._decayed_usage(resource, now) + hold_time, now)
+        # sweeping once per as many releases as there are usages keeps the amortized cost of a release constant
+        self._released_since_eviction += 1
+        if self._released_since_eviction >= len(self._usages):
+            self._released_since_eviction = 0
+            for evicted_resource in [r for r in self._usages if self._decayed_usage(r, now) < _MIN_DECAYED_USAGE]:
+                del self._usages[evicted_resource]
+
+    def _decayed_usage(self, resource: TResource, now: float) -> float:
+        usage = self._usages.get(resource)
+        if usage is None:
+            return 0.0
+        value, updated_at = usage
+        return value * math.exp(-self._decay_rate * (now - updated_at))
+
+
 class ThrottleQuota(abc.ABC):
     __slots__ = ()
 
@@ -68,10 +127,79 @@ class RandomRejectThrottleQuota(ThrottleQuota):
 
     def __init__(self, reject_probability: float, seed: Any = None):
         if reject_probability < 0 or reject_probability > 1:
-            raise ValueError("MaxFractionCapacityQuota max_fraction value must be in range [0, 1]")
+            raise ValueError("RandomRejectThrottleQuota reject_probability value must be in range [0, 1]")
 
         self._reject_probability = reject_probability
         self._random = random.Random(seed)
 
     def can_be_accepted(self) -> bool:
-        return self._reject_probability == 0 or self._random.random() < self._reject_probability
+        return self._reject_probability == 0 or self._random.random() >= self._reject_probability
+
+
+class ThrottleLoadQuota(abc.ABC):
+    __slots__ = ()
+
+    @abc.abstractmethod
+    def can_be_accepted(
+        self,
+        priority: Optional[str],
+        used_capacity: int,
+        capacity_limit: int,
+        queue_size: int,
+        queue_limit: int,
+    ) -> bool:
+        ...
+
+
+class CompositeThrottleLoadQuota(ThrottleLoadQuota):
+    __slots__ = ("_quotas",)
+
+    def __init__(self, quotas: List[ThrottleLoadQuota]):
+        self._quotas = quotas
+
+    def can_be_accepted(
+        self,
+        priority: Optional[str],
+        used_capacity: int,
+        capacity_limit: int,
+        queue_size: int,
+        queue_limit: int,
+    ) -> bool:
+        for quota in self._quotas:
+            if not quota.can_be_accepted(priority, used_capacity, capacity_limit, queue_size, queue_limit):
+                return False
+        return True
+
+
+class RandomEarlyDetectionThrottleQuota(ThrottleLoadQuota):
+    __slots__ = ("_low_watermark", "_priority_factors", "_random")
+
+    def __init__(
+        self,
+        low_watermark: float = 0.5,
+        priority_factors: Optional[Mapping[str, float]] = None,
+        seed: Any = None,
+    ):
+        if low_watermark < 0 or low_watermark >= 1:
+            raise ValueError("RandomEarlyDetectionThrottleQuota low_watermark value must be in range [0, 1)")
+
+        self._low_watermark = low_watermark
+        self._priority_factors = priority_factors or {}
+        self._random = random.Random(seed)
+
+    def can_be_accepted(
+        self,
+        priority: Optional[str],
+        used_capacity: int,
+        capacity_limit: int,
+        queue_size: int,
+        queue_limit: int,
+    ) -> bool:
+        # the occupancy of both capacity and queue, rejection probability grows linearly from the low watermark
+        occupancy = (used_capacity + queue_size) * 1.0 / (capacity_limit + queue_limit)
+        if occupancy <= self._low_watermark:
+            return True
+        reject_probability = (occupancy - self._low_watermark) / (1 - self._low_watermark)
+        if priority is not None:
+            reject_probability *= self._priority_factors.get(priority, 1.0)
+        return reject_probability < 1 and self._random.random() >= reject_probability
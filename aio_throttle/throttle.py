@@ -1,11 +1,39 @@
+import asyncio
 import contextlib
-from typing import AsyncIterator, Optional, List, Dict
+import threading
+import time
+from typing import (
+    AsyncIterable,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+    Union,
+)
 
-from .base import ThrottlePriority, ThrottleResult, ThrottleStats
-from .internals import LifoSemaphore
-from .metrics import MetricsProvider, NOOP_METRICS_PROVIDER
-from .quotas import ThrottleCapacityQuota, CompositeThrottleCapacityQuota, ThrottleQuota, CompositeThrottleQuota
-from .utils import increment_counter, decrement_counter
+from .base import DEFAULT_CRITICALITY_LEVELS, ThrottleCriticalityLevels, ThrottleResult, ThrottleStats
+from .listeners import ThrottleListener, create_listener
+from .internals import LifoSemaphore, ThreadSafeLifoSemaphore
+from .metrics import MetricsProvider, NOOP_METRICS_PROVIDER, RenamingMetricsProvider
+from .quotas import (
+    ThrottleCapacityQuota,
+    CompositeThrottleCapacityQuota,
+    ThrottleQuota,
+    CompositeThrottleQuota,
+    ThrottleLoadQuota,
+    CompositeThrottleLoadQuota,
+)
+from .utils import increment_counter, decrement_counter, to_async_iterator
+
+_EWMA_ALPHA = 0.1
+
+T = TypeVar("T")
+R = TypeVar("R")
 
 
 class Throttler:
@@ -19,6 +47,25 @@ class Throttler:
         "_priorities_used_capacity",
         "_quota",
         "_metrics_provider",
+        "_queue_size_ewma",
+        "_release_interval_ewma",
+        "_release_interval_started_at",
+        "_listener",
+        "_hold_time_ewma",
+        "_clock",
+        "_load_quota",
+        "_draining",
+        "_drain_waiters",
+        "_full_capacity_limit",
+        "_full_queue_limit",
+        "_warming_up",
+        "_warmup_duration",
+        "_warmup_initial_fraction",
+        "_warmup_max_latency",
+        "_warmup_progress",
+        "_warmup_updated_at",
+        "_levels",
+        "_rejection_rate_ewma",
     )
 
     def __init__(
@@ -26,24 +73,57 @@ class Throttler:
         capacity_limit: int,
         queue_limit: int = 0,
         consumer_quotas: Optional[List[ThrottleCapacityQuota[str]]] = None,
-        priority_quotas: Optional[List[ThrottleCapacityQuota[ThrottlePriority]]] = None,
+        priority_quotas: Optional[List[ThrottleCapacityQuota[str]]] = None,
         quotas: Optional[List[ThrottleQuota]] = None,
         metrics_provider: MetricsProvider = NOOP_METRICS_PROVIDER,
+        listeners: Optional[List[ThrottleListener]] = None,
+        load_quotas: Optional[List[ThrottleLoadQuota]] = None,
+        clock: Callable[[], float] = time.monotonic,
+        warmup_duration: float = 0,
+        warmup_initial_fraction: float = 0.1,
+        warmup_max_latency: Optional[float] = None,
+        criticality_levels: ThrottleCriticalityLevels = DEFAULT_CRITICALITY_LEVELS,
     ):
         if capacity_limit < 1:
             raise ValueError("Throttler capacity_limit value must be >= 1")
         if queue_limit < 0:
             raise ValueError("Throttler queue limit must be >= 0")
+        if warmup_duration < 0:
+            raise ValueError("Throttler warmup_duration must be >= 0")
+        if warmup_initial_fraction <= 0 or warmup_initial_fraction > 1:
+            raise ValueError("Throttler warmup_initial_fraction value must be in range (0, 1]")
+
+        self._full_capacity_limit = capacity_limit
+        self._full_queue_limit = queue_limit
+        self._warming_up = warmup_duration > 0
+        self._warmup_duration = warmup_duration
+        self._warmup_initial_fraction = warmup_initial_fraction
+        self._warmup_max_latency = warmup_max_latency
+        self._warmup_progress = 0.0
+        self._warmup_updated_at = clock()
+        if self._warming_up:
+            capacity_limit, queue_limit = self._warmup_limits(warmup_initial_fraction)
 
         self._capacity_limit: int = capacity_limit
         self._queue_limit: int = queue_limit
         self._semaphore: LifoSemaphore = LifoSemaphore(capacity_limit)
         self._consumers_used_capacity: Dict[str, int] = {}
         self._consumer_quota = CompositeThrottleCapacityQuota(consumer_quotas or [])
-        self._priorities_used_capacity: Dict[ThrottlePriority, int] = {}
+        self._levels = criticality_levels
+        self._priorities_used_capacity: List[int] = [0] * len(criticality_levels)
         self._priority_quota = CompositeThrottleCapacityQuota(priority_quotas or [])
         self._quota = CompositeThrottleQuota(quotas or [])
         self._metrics_provider = metrics_provider
+        self._queue_size_ewma: float = 0.0
+        self._release_interval_ewma: Optional[float] = None
+        self._release_interval_started_at: Optional[float] = None
+        self._listener = create_listener(listeners)
+        self._clock = clock
+        self._load_quota = CompositeThrottleLoadQuota(load_quotas or [])
+        self._draining = False
+        self._drain_waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future[None]]] = []
+        self._hold_time_ewma: Optional[float] = None
+        self._rejection_rate_ewma: float = 0.0
 
     @property
     def stats(self) -> ThrottleStats:
@@ -53,45 +133,195 @@ class Throttler:
             self._semaphore.waiting,
             self._queue_limit,
             self._consumers_used_capacity,
-            self._priorities_used_capacity,
+            self._levels_used_capacity(),
         )
 
+    @property
+    def estimated_time_to_capacity(self) -> float:
+        if self._semaphore.available > 0 or self._release_interval_ewma is None:
+            return 0.0
+        return (self._queue_size_ewma + 1) * self._release_interval_ewma
+
+    @property
+    def estimated_service_time(self) -> float:
+        return self._hold_time_ewma if self._hold_time_ewma is not None else 0.0
+
+    @property
+    def rejection_rate(self) -> float:
+        return self._rejection_rate_ewma
+
     @contextlib.asynccontextmanager
     async def throttle(
-        self, *, consumer: Optional[str] = None, priority: Optional[ThrottlePriority] = None
+        self,
+        *,
+        consumer: Optional[str] = None,
+        priority: Optional[Union[str, int]] = None,
+        timeout: Optional[float] = None,
+        long_lived: bool = False,
     ) -> AsyncIterator[ThrottleResult]:
-        check_queue_and_quotas_result = self._check_queue(priority) and self._check_quotas(consumer, priority)
-        if not check_queue_and_quotas_result:
-            self._capture_throttled_request_metric(consumer, priority, check_queue_and_quotas_result)
-            yield check_queue_and_quotas_result
-        elif self._acquire_capacity_slot_no_wait():
-            try:
-                self._increment_counters(consumer, priority)
-                yield ThrottleResult.ACCEPTED
-            finally:
-                self._decrement_counters(consumer, priority)
-                self._release_capacity_slot()
-        else:
-            await self._acquire_capacity_slot()
-            check_quota_result = self._check_quotas(consumer, priority)
+        listener = self._listener
+        level = self._levels.parse(priority) if priority is not None else None
+        enqueued_at = self._clock()
+        if self._warming_up:
+            self._update_warmup(enqueued_at)
+        check_result = (
+            self._check_drain()
+            and self._check_deadline(timeout)
+            and self._check_queue(level)
+            and self._check_load(level)
+        )
+        if not check_result:
+            self._reject(consumer, level, check_result)
+            yield check_result
+            return
+
+        # the quotas are checked together with taking a slot, so concurrent requests cannot both pass them
+        acquire_result = self._check_quotas_and_acquire_no_wait(consumer, level)
+        if acquire_result is not None and not acquire_result:
+            self._reject(consumer, level, acquire_result)
+            yield acquire_result
+            return
+        if acquire_result is None:
+            if listener is not None:
+                listener.on_enqueued(consumer, self._level_name(level))
+            if not await self._acquire_capacity_slot(
+                None if timeout is None else enqueued_at + timeout - self._clock()
+            ):
+                acquire_result = (
+                    ThrottleResult.REJECTED_DUE_TO_DRAIN if self._draining else ThrottleResult.REJECTED_DUE_TO_DEADLINE
+                )
+                self._reject(consumer, level, acquire_result)
+                yield acquire_result
+                return
+            check_quota_result = self._check_quotas_and_increment(consumer, level)
             if not check_quota_result:
                 try:
-                    self._capture_throttled_request_metric(consumer, priority, check_queue_and_quotas_result)
+                    self._reject(consumer, level, check_quota_result)
                     yield check_quota_result
                 finally:
                     self._release_capacity_slot()
-            else:
-                try:
-                    self._increment_counters(consumer, priority)
-                    yield ThrottleResult.ACCEPTED
-                finally:
-                    self._decrement_counters(consumer, priority)
-                    self._release_capacity_slot()
+                return
+
+        acquired_at = self._clock()
+        self._update_rejection_rate(False)
+        self._start_release_interval(acquired_at)
+        try:
+            if listener is not None:
+                listener.on_acquired(consumer, self._level_name(level), acquired_at - enqueued_at)
+            yield ThrottleResult.ACCEPTED
+        finally:
+            hold_time = self._clock() - acquired_at
+            # long-lived holds, e.g. of streaming responses, are not a service time
+            if not long_lived:
+                self._update_hold_time(hold_time)
+            self._decrement_counters(consumer, level, hold_time)
+            self._release_capacity_slot()
+            if listener is not None:
+                listener.on_released(consumer, self._level_name(level), hold_time)
+
+    async def drain(self, timeout: Optional[float] = None) -> bool:
+        self._draining = True
+        self._semaphore.close()
+
+        loop = asyncio.get_running_loop()
+        drain_waiter: Tuple[asyncio.AbstractEventLoop, asyncio.Future[None]] = (loop, loop.create_future())
+        self._drain_waiters.append(drain_waiter)
+        try:
+            if self._semaphore.available < self._semaphore.limit:
+                await asyncio.wait_for(drain_waiter[1], timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self._drain_waiters.remove(drain_waiter)
+
+    async def map(
+        self,
+        func: Callable[[T], Awaitable[R]],
+        items: Union[Iterable[T], AsyncIterable[T]],
+        *,
+        consumer: Optional[Callable[[T], Optional[str]]] = None,
+        priority: Optional[Callable[[T], Optional[Union[str, int]]]] = None,
+        ordered: bool = False,
+        concurrency: Optional[int] = None,
+    ) -> AsyncIterator[Tuple[T, ThrottleResult, Optional[R]]]:
+        limit = concurrency if concurrency is not None else self._capacity_limit
+        if limit < 1:
+            raise ValueError("Throttler map concurrency must be >= 1")
+
+        iterator = to_async_iterator(items)
+        indexes: Dict["asyncio.Future[Tuple[T, ThrottleResult, Optional[R]]]", int] = {}
+        completed: Dict[int, Tuple[T, ThrottleResult, Optional[R]]] = {}
+        next_index, next_yielded_index, exhausted = 0, 0, False
+        try:
+            while True:
+                while not exhausted and len(indexes) + len(completed) < limit:
+                    try:
+                        item = await iterator.__anext__()
+                    except StopAsyncIteration:
+                        exhausted = True
+                        break
+                    item_consumer = consumer(item) if consumer is not None else None
+                    item_priority = priority(item) if priority is not None else None
+                    future = asyncio.ensure_future(self._call(func, item, item_consumer, item_priority))
+                    indexes[future] = next_index
+                    next_index += 1
+
+                if not indexes:
+                    return
+
+                done, _ = await asyncio.wait(indexes.keys(), return_when=asyncio.FIRST_COMPLETED)
+                for done_future in done:
+                    index = indexes.pop(done_future)
+                    if ordered:
+                        completed[index] = done_future.result()
+                    else:
+                        yield done_future.result()
+                while next_yielded_index in completed:
+                    yield completed.pop(next_yielded_index)
+                    next_yielded_index += 1
+        finally:
+            for pending_future in indexes:
+                pending_future.cancel()
+            if indexes:
+                await asyncio.gather(*indexes, return_exceptions=True)
+
+    async def _call(
+        self,
+        func: Callable[[T], Awaitable[R]],
+        item: T,
+        consumer: Optional[str],
+        priority: Optional[Union[str, int]],
+    ) -> Tuple[T, ThrottleResult, Optional[R]]:
+        async with self.throttle(consumer=consumer, priority=priority) as result:
+            if not result:
+                return item, result, None
+            return item, result, await func(item)
+
+    def _reject(self, consumer: Optional[str], level: Optional[int], result: ThrottleResult) -> None:
+        priority = self._level_name(level)
+        self._update_rejection_rate(True)
+        self._capture_throttled_request_metric(consumer, priority, result)
+        if self._listener is not None:
+            self._listener.on_rejected(consumer, priority, result)
+
+    def _update_rejection_rate(self, rejected: bool) -> None:
+        self._rejection_rate_ewma += _EWMA_ALPHA * ((1.0 if rejected else 0.0) - self._rejection_rate_ewma)
+
+    def _level_name(self, level: Optional[int]) -> Optional[str]:
+        return self._levels[level].name if level is not None else None
+
+    def _levels_used_capacity(self) -> Dict[str, int]:
+        return {
+            self._levels[level].name: used_capacity
+            for level, used_capacity in enumerate(self._priorities_used_capacity)
+            if used_capacity > 0
+        }
 
     def _capture_throttled_request_metric(
         self,
         consumer: Optional[str],
-        priority: Optional[ThrottlePriority],
+        priority: Optional[str],
         result: ThrottleResult,
     ) -> None:
         tags: Dict[str, str] = {}
@@ -103,15 +333,20 @@ class Throttler:
 
         self._metrics_provider.increment_counter("aio_throttle_requests", tags)
 
-    def _check_quotas(
-        self, consumer: Optional[str] = None, priority: Optional[ThrottlePriority] = None
-    ) -> ThrottleResult:
+    def _check_quotas(self, consumer: Optional[str] = None, level: Optional[int] = None) -> ThrottleResult:
         if not self._quota.can_be_accepted():
             return ThrottleResult.REJECTED_DUE_TO_QUOTA
 
-        if priority is not None:
-            priority_used_capacity = self._priorities_used_capacity.get(priority, 0)
-            if not self._priority_quota.can_be_accepted(priority, priority_used_capacity + 1, self._capacity_limit):
+        if level is not None:
+            criticality = self._levels[level]
+            priority_used_capacity = self._priorities_used_capacity[level] + 1
+            # a full fraction is not checked, otherwise requests that could be queued would be rejected by it
+            if (
+                criticality.capacity_fraction < 1
+                and priority_used_capacity * 1.0 / self._capacity_limit > criticality.capacity_fraction
+            ):
+                return ThrottleResult.REJECTED_DUE_TO_PRIORITY_QUOTA
+            if not self._priority_quota.can_be_accepted(criticality.name, priority_used_capacity, self._capacity_limit):
                 return ThrottleResult.REJECTED_DUE_TO_PRIORITY_QUOTA
         if consumer is not None:
             consumer_used_capacity = self._consumers_used_capacity.get(consumer, 0)
@@ -119,31 +354,304 @@ class Throttler:
                 return ThrottleResult.REJECTED_DUE_TO_CONSUMER_QUOTA
         return ThrottleResult.ACCEPTED
 
-    def _check_queue(self, priority: Optional[ThrottlePriority] = None) -> ThrottleResult:
+    def _warmup_limits(self, fraction: float) -> Tuple[int, int]:
+        return max(1, int(fraction * self._full_capacity_limit)), int(fraction * self._full_queue_limit)
+
+    def _update_warmup(self, now: float) -> None:
+        if self._warmup_max_latency is None or self.estimated_service_time <= self._warmup_max_latency:
+            self._warmup_progress += now - self._warmup_updated_at
+        self._warmup_updated_at = now
+
+        initial_fraction = self._warmup_initial_fraction
+        fraction = initial_fraction + (1 - initial_fraction) * self._warmup_progress / self._warmup_duration
+        if fraction >= 1:
+            fraction = 1
+            self._warming_up = False
+        capacity_limit, self._queue_limit = self._warmup_limits(fraction)
+        if capacity_limit != self._capacity_limit:
+            self._semaphore.resize(capacity_limit)
+            self._capacity_limit = capacity_limit
+
+    def _check_drain(self) -> ThrottleResult:
+        if self._draining:
+            return ThrottleResult.REJECTED_DUE_TO_DRAIN
+        return ThrottleResult.ACCEPTED
+
+    def _check_deadline(self, timeout: Optional[float] = None) -> ThrottleResult:
+        if (
+            timeout is not None
+            and self._semaphore.available == 0
+            and self.estimated_time_to_capacity + self.estimated_service_time > timeout
+        ):
+            return ThrottleResult.REJECTED_DUE_TO_DEADLINE
+        return ThrottleResult.ACCEPTED
+
+    def _check_queue(self, level: Optional[int] = None) -> ThrottleResult:
         queue_size = self._semaphore.waiting
-        if queue_size > 0 and priority == ThrottlePriority.LOW:
+        self._queue_size_ewma += _EWMA_ALPHA * (queue_size - self._queue_size_ewma)
+        if (
+            level is not None
+            and queue_size > 0
+            and queue_size >= self._levels[level].queue_fraction * self._queue_limit
+        ):
             return ThrottleResult.REJECTED_DUE_TO_FULL_QUEUE
         if queue_size >= self._queue_limit and self._semaphore.available == 0:
             return ThrottleResult.REJECTED_DUE_TO_FULL_QUEUE
         return ThrottleResult.ACCEPTED
 
-    def _increment_counters(self, consumer: Optional[str] = None, priority: Optional[ThrottlePriority] = None) -> None:
-        if priority is not None:
-            increment_counter(self._priorities_used_capacity, priority)
+    def _check_load(self, level: Optional[int] = None) -> ThrottleResult:
+        used_capacity = self._capacity_limit - self._semaphore.available
+        if not self._load_quota.can_be_accepted(
+            self._level_name(level), used_capacity, self._capacity_limit, self._semaphore.waiting, self._queue_limit
+        ):
+            return ThrottleResult.REJECTED_DUE_TO_QUOTA
+        return ThrottleResult.ACCEPTED
+
+    def _increment_counters(self, consumer: Optional[str] = None, level: Optional[int] = None) -> None:
+        if level is not None:
+            self._priorities_used_capacity[level] += 1
         if consumer is not None:
             increment_counter(self._consumers_used_capacity, consumer)
 
-    def _decrement_counters(self, consumer: Optional[str] = None, priority: Optional[ThrottlePriority] = None) -> None:
+    def _decrement_counters(
+        self, consumer: Optional[str] = None, level: Optional[int] = None, hold_time: float = 0.0
+    ) -> None:
         if consumer is not None:
             decrement_counter(self._consumers_used_capacity, consumer)
-        if priority is not None:
-            decrement_counter(self._priorities_used_capacity, priority)
+            self._consumer_quota.on_released(consumer, hold_time)
+        if level is not None:
+            self._priorities_used_capacity[level] -= 1
+            self._priority_quota.on_released(self._levels[level].name, hold_time)
 
-    def _acquire_capacity_slot_no_wait(self) -> bool:
-        return self._semaphore.acquire_no_wait()
+    def _update_hold_time(self, hold_time: float) -> None:
+        if self._hold_time_ewma is None:
+            self._hold_time_ewma = hold_time
+        else:
+            self._hold_time_ewma += _EWMA_ALPHA * (hold_time - self._hold_time_ewma)
 
-    async def _acquire_capacity_slot(self) -> None:
-        await self._semaphore.acquire()
+    def _check_quotas_and_acquire_no_wait(
+        self, consumer: Optional[str] = None, level: Optional[int] = None
+    ) -> Optional[ThrottleResult]:
+        # None means that the quotas are met, but no capacity slot is free
+        check_result = self._check_quotas(consumer, level)
+        if not check_result:
+            return check_result
+        if not self._semaphore.acquire_no_wait():
+            return None
+        self._increment_counters(consumer, level)
+        return check_result
+
+    def _check_quotas_and_increment(
+        self, consumer: Optional[str] = None, level: Optional[int] = None
+    ) -> ThrottleResult:
+        check_result = self._check_quotas(consumer, level)
+        if check_result:
+            self._increment_counters(consumer, level)
+        return check_result
+
+    async def _acquire_capacity_slot(self, timeout: Optional[float] = None) -> bool:
+        if timeout is None:
+            return await self._semaphore.acquire()
+        try:
+            return await asyncio.wait_for(self._semaphore.acquire(), timeout)
+        except asyncio.TimeoutError:
+            return False
+
+    def _start_release_interval(self, now: float) -> None:
+        if self._release_interval_started_at is None and self._semaphore.available == 0:
+            self._release_interval_started_at = now
 
     def _release_capacity_slot(self) -> None:
+        now = self._clock()
+        # intervals are only measured while all slots are taken, so idle periods never get into the estimate
+        if self._semaphore.available == 0 and self._release_interval_started_at is not None:
+            interval = now - self._release_interval_started_at
+            if self._release_interval_ewma is None:
+                self._release_interval_ewma = interval
+            else:
+                self._release_interval_ewma += _EWMA_ALPHA * (interval - self._release_interval_ewma)
+        # the released slot goes to a waiter and the capacity stays saturated, otherwise it becomes free
+        self._release_interval_started_at = now if self._semaphore.waiting > 0 else None
         self._semaphore.release()
+        if self._drain_waiters and self._semaphore.available == self._semaphore.limit:
+            for loop, future in tuple(self._drain_waiters):
+                loop.call_soon_threadsafe(_set_result_if_not_done, future)
+
+
+def _set_result_if_not_done(future: "asyncio.Future[None]") -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class ThreadSafeThrottler(Throttler):
+    __slots__ = ("_lock",)
+
+    def __init__(
+        self,
+        capacity_limit: int,
+        queue_limit: int = 0,
+        consumer_quotas: Optional[List[ThrottleCapacityQuota[str]]] = None,
+        priority_quotas: Optional[List[ThrottleCapacityQuota[str]]] = None,
+        quotas: Optional[List[ThrottleQuota]] = None,
+        metrics_provider: MetricsProvider = NOOP_METRICS_PROVIDER,
+        listeners: Optional[List[ThrottleListener]] = None,
+        load_quotas: Optional[List[ThrottleLoadQuota]] = None,
+        clock: Callable[[], float] = time.monotonic,
+        warmup_duration: float = 0,
+        warmup_initial_fraction: float = 0.1,
+        warmup_max_latency: Optional[float] = None,
+        criticality_levels: ThrottleCriticalityLevels = DEFAULT_CRITICALITY_LEVELS,
+    ):
+        super().__init__(
+            capacity_limit,
+            queue_limit,
+            consumer_quotas,
+            priority_quotas,
+            quotas,
+            metrics_provider,
+            listeners,
+            load_quotas,
+            clock,
+            warmup_duration,
+            warmup_initial_fraction,
+            warmup_max_latency,
+            criticality_levels,
+        )
+        self._semaphore = ThreadSafeLifoSemaphore(self._capacity_limit)
+        # reentrant, as the combined checks below call the locked ones
+        self._lock = threading.RLock()
+
+    @property
+    def stats(self) -> ThrottleStats:
+        with self._lock:
+            return ThrottleStats(
+                self._semaphore.available,
+                self._capacity_limit,
+                self._semaphore.waiting,
+                self._queue_limit,
+                dict(self._consumers_used_capacity),
+                self._levels_used_capacity(),
+            )
+
+    def _check_quotas(self, consumer: Optional[str] = None, level: Optional[int] = None) -> ThrottleResult:
+        with self._lock:
+            return super()._check_quotas(consumer, level)
+
+    def _check_quotas_and_acquire_no_wait(
+        self, consumer: Optional[str] = None, level: Optional[int] = None
+    ) -> Optional[ThrottleResult]:
+        with self._lock:
+            return super()._check_quotas_and_acquire_no_wait(consumer, level)
+
+    def _check_quotas_and_increment(
+        self, consumer: Optional[str] = None, level: Optional[int] = None
+    ) -> ThrottleResult:
+        with self._lock:
+            return super()._check_quotas_and_increment(consumer, level)
+
+    def _check_queue(self, level: Optional[int] = None) -> ThrottleResult:
+        with self._lock:
+            return super()._check_queue(level)
+
+    def _check_load(self, level: Optional[int] = None) -> ThrottleResult:
+        with self._lock:
+            return super()._check_load(level)
+
+    def _update_hold_time(self, hold_time: float) -> None:
+        with self._lock:
+            super()._update_hold_time(hold_time)
+
+    def _start_release_interval(self, now: float) -> None:
+        with self._lock:
+            super()._start_release_interval(now)
+
+    def _update_rejection_rate(self, rejected: bool) -> None:
+        with self._lock:
+            super()._update_rejection_rate(rejected)
+
+    def _update_warmup(self, now: float) -> None:
+        with self._lock:
+            if self._warming_up:
+                super()._update_warmup(now)
+
+    def _increment_counters(self, consumer: Optional[str] = None, level: Optional[int] = None) -> None:
+        with self._lock:
+            super()._increment_counters(consumer, level)
+
+    def _decrement_counters(
+        self, consumer: Optional[str] = None, level: Optional[int] = None, hold_time: float = 0.0
+    ) -> None:
+        with self._lock:
+            super()._decrement_counters(consumer, level, hold_time)
+
+    def _release_capacity_slot(self) -> None:
+        with self._lock:
+            super()._release_capacity_slot()
+
+
+class OutboundThrottler:
+    __slots__ = (
+        "_capacity_limit",
+        "_queue_limit",
+        "_priority_quotas",
+        "_metrics_provider",
+        "_listeners",
+        "_levels",
+        "_throttlers",
+    )
+
+    def __init__(
+        self,
+        capacity_limit: int,
+        queue_limit: int = 0,
+        priority_quotas: Optional[List[ThrottleCapacityQuota[str]]] = None,
+        metrics_provider: MetricsProvider = NOOP_METRICS_PROVIDER,
+        listeners: Optional[List[ThrottleListener]] = None,
+        criticality_levels: ThrottleCriticalityLevels = DEFAULT_CRITICALITY_LEVELS,
+    ):
+        if capacity_limit < 1:
+            raise ValueError("OutboundThrottler capacity_limit value must be >= 1")
+        if queue_limit < 0:
+            raise ValueError("OutboundThrottler queue limit must be >= 0")
+
+        self._capacity_limit = capacity_limit
+        self._queue_limit = queue_limit
+        self._priority_quotas = priority_quotas
+        self._metrics_provider = RenamingMetricsProvider(
+            metrics_provider, {"aio_throttle_requests": "aio_throttle_outbound_requests"}, {"consumer": "host"}
+        )
+        self._listeners = listeners
+        self._levels = criticality_levels
+        self._throttlers: Dict[str, Throttler] = {}
+
+    @property
+    def stats(self) -> Dict[str, ThrottleStats]:
+        return {host: throttler.stats for host, throttler in self._throttlers.items()}
+
+    @contextlib.asynccontextmanager
+    async def throttle(
+        self, host: str, *, priority: Optional[Union[str, int]] = None, timeout: Optional[float] = None
+    ) -> AsyncIterator[ThrottleResult]:
+        throttler = self._throttlers.get(host)
+        if throttler is None:
+            throttler = Throttler(
+                self._capacity_limit,
+                self._queue_limit,
+                priority_quotas=self._priority_quotas,
+                metrics_provider=self._metrics_provider,
+                listeners=self._listeners,
+                criticality_levels=self._levels,
+            )
+            self._throttlers[host] = throttler
+        try:
+            # the priority is always set to keep the same metric tags for every request
+            async with throttler.throttle(
+                consumer=host, priority=self._levels.parse(priority), timeout=timeout
+            ) as throttle_result:
+                yield throttle_result
+        finally:
+            # idle throttlers are dropped, otherwise every host ever called would be kept
+            stats = throttler.stats
+            if stats.available_capacity == stats.capacity_limit and stats.queue_size == 0:
+                if self._throttlers.get(host) is throttler:
+                    del self._throttlers[host]
@@ -0,0 +1,273 @@
+import argparse
+import asyncio
+import dataclasses
+import gzip
+import itertools
+import json
+import math
+import selectors
+import sys
+from typing import IO, Callable, Iterator, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from .base import ThrottlePriority
+from .quotas import MaxFractionCapacityQuota, ThrottleCapacityQuota
+from .throttle import Throttler
+
+
+class TraceRecord(NamedTuple):
+    arrival_time: float
+    consumer: Optional[str]
+    priority: ThrottlePriority
+    duration: float
+
+
+@dataclasses.dataclass(frozen=True)
+class TuneConfig:
+    capacity_limit: int
+    queue_limit: int
+    consumer_fraction: float
+    priority_fraction: float
+
+
+@dataclasses.dataclass(frozen=True)
+class ReplayResult:
+    config: TuneConfig
+    accepted: int
+    rejected: int
+    duration: float
+    wait_percentile: float
+
+    @property
+    def goodput(self) -> float:
+        return self.accepted / self.duration if self.duration > 0 else float(self.accepted)
+
+
+class WaitHistogram:
+    __slots__ = ("_counts", "_total")
+
+    _MIN_WAIT = 1e-4
+    _GROWTH = 1.05
+
+    def __init__(self) -> None:
+        self._counts: List[int] = []
+        self._total = 0
+
+    def add(self, wait: float) -> None:
+        index = 0 if wait <= self._MIN_WAIT else 1 + int(math.log(wait / self._MIN_WAIT, self._GROWTH))
+        if index >= len(self._counts):
+            self._counts.extend([0] * (index + 1 - len(self._counts)))
+        self._counts[index] += 1
+        self._total += 1
+
+    def percentile(self, percentile: float) -> float:
+        rank = math.ceil(self._total * percentile / 100)
+        seen = 0
+        for index, count in enumerate(self._counts):
+            seen += count
+            if seen >= rank and count > 0:
+                return 0.0 if index == 0 else self._MIN_WAIT * self._GROWTH**index
+        return 0.0
+
+
+class _SimulatedTimeSelector(selectors.DefaultSelector):
+    def __init__(self) -> None:
+        super().__init__()
+        self.time = 0.0
+
+    def select(self, timeout: Optional[float] = None) -> List[Tuple[selectors.SelectorKey, int]]:
+        if timeout is not None and timeout > 0:
+            self.time += timeout
+        return super().select(0)
+
+
+class _SimulatedEventLoop(asyncio.SelectorEventLoop):
+    def __init__(self) -> None:
+        self._simulated_time_selector = _SimulatedTimeSelector()
+        super().__init__(self._simulated_time_selector)
+
+    def time(self) -> float:
+        return self._simulated_time_selector.time
+
+
+def read_trace(stream: IO[str]) -> Iterator[TraceRecord]:
+    for line in stream:
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        yield TraceRecord(
+            float(record["arrival_time"]),
+            record.get("consumer"),
+            ThrottlePriority.parse(record.get("priority")),
+            float(record["duration"]),
+        )
+
+
+def replay(
+    records: Iterator[TraceRecord],
+    config: TuneConfig,
+    percentile: float,
+    saturation_concurrency: Optional[int] = None,
+) -> ReplayResult:
+    loop = _SimulatedEventLoop()
+    try:
+        return loop.run_until_complete(_replay(records, config, percentile, saturation_concurrency, loop.time))
+    finally:
+        loop.close()
+
+
+def tune(
+    open_trace: Callable[[], IO[str]],
+    configs: Sequence[TuneConfig],
+    percentile: float,
+    max_wait: float,
+    saturation_concurrency: Optional[int] = None,
+    goodput_tolerance: float = 0.05,
+) -> Tuple[Optional[ReplayResult], List[ReplayResult]]:
+    results = []
+    for config in configs:
+        with open_trace() as stream:
+            results.append(replay(read_trace(stream), config, percentile, saturation_concurrency))
+    feasible = [result for result in results if result.wait_percentile <= max_wait]
+    if not feasible:
+        return None, results
+    # larger limits accept more of a burst, but past the saturation point they only add latency and memory,
+    # so the smallest configuration with nearly the best goodput is preferred
+    min_goodput = (1 - goodput_tolerance) * max(result.goodput for result in feasible)
+    best = min(
+        (result for result in feasible if result.goodput >= min_goodput),
+        key=lambda r: (r.config.capacity_limit, r.config.queue_limit, -r.goodput, r.wait_percentile),
+    )
+    return best, results
+
+
+async def _replay(
+    records: Iterator[TraceRecord],
+    config: TuneConfig,
+    percentile: float,
+    saturation_concurrency: Optional[int],
+    clock: Callable[[], float],
+) -> ReplayResult:
+    # a fraction of 1 disables the quota, otherwise requests that could be queued would be rejected by it
+    consumer_quotas: List[ThrottleCapacityQuota[str]] = []
+    if config.consumer_fraction < 1:
+        consumer_quotas.append(MaxFractionCapacityQuota[str](config.consumer_fraction))
+    priority_quotas: List[ThrottleCapacityQuota[str]] = []
+    if config.priority_fraction < 1:
+        priority_quotas.append(MaxFractionCapacityQuota[str](config.priority_fraction, ThrottlePriority.NORMAL))
+    throttler = Throttler(config.capacity_limit, config.queue_limit, consumer_quotas, priority_quotas, clock=clock)
+    histogram = WaitHistogram()
+    accepted, rejected, in_flight = 0, 0, 0
+
+    async def handle(record: TraceRecord, arrived_at: float) -> None:
+        nonlocal accepted, rejected, in_flight
+        async with throttler.throttle(consumer=record.consumer, priority=record.priority) as result:
+            if not result:
+                rejected += 1
+                return
+            accepted += 1
+            histogram.add(clock() - arrived_at)
+            in_flight += 1
+            try:
+                await asyncio.sleep(_service_time(record.duration, in_flight, saturation_concurrency))
+            finally:
+                in_flight -= 1
+
+    tasks: Set["asyncio.Task[None]"] = set()
+    started_at = clock()
+    first_arrival_time: Optional[float] = None
+    for record in records:
+        if first_arrival_time is None:
+            first_arrival_time = record.arrival_time
+        delay = started_at + record.arrival_time - first_arrival_time - clock()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        task = asyncio.ensure_future(handle(record, clock()))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    if tasks:
+        await asyncio.gather(*tasks)
+
+    return ReplayResult(config, accepted, rejected, clock() - started_at, histogram.percentile(percentile))
+
+
+def _service_time(duration: float, in_flight: int, saturation_concurrency: Optional[int]) -> float:
+    # past the saturation point the service shares its throughput, so a request takes proportionally longer
+    if saturation_concurrency is None or in_flight <= saturation_concurrency:
+        return duration
+    return duration * in_flight / saturation_concurrency
+
+
+def _open_trace(path: str) -> IO[str]:
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt")
+    return open(path)
+
+
+def _parse_list(value: str, parse: Callable[[str], float]) -> List[float]:
+    return [parse(item) for item in value.split(",") if item]
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m aio_throttle.tune",
+        description="Replay a recorded request trace against candidate throttler configurations",
+    )
+    parser.add_argument("trace", help="JSONL file (optionally gzipped) with arrival_time, consumer, priority, duration")
+    parser.add_argument("--capacity-limits", default="16,32,64,128,256")
+    parser.add_argument("--queue-limits", default="0,64,128,256,512")
+    parser.add_argument("--consumer-fractions", default="0.5,0.7,1")
+    parser.add_argument("--priority-fractions", default="0.9,1")
+    parser.add_argument("--percentile", type=float, default=99, help="queue wait percentile to constrain")
+    parser.add_argument("--max-wait", type=float, default=0.1, help="target queue wait in seconds")
+    parser.add_argument(
+        "--saturation-concurrency",
+        type=int,
+        default=None,
+        help="concurrency past which service times grow proportionally, recorded durations are replayed as is if unset",
+    )
+    parser.add_argument(
+        "--goodput-tolerance",
+        type=float,
+        default=0.05,
+        help="fraction of the best goodput the smallest picked configuration may lose",
+    )
+    args = parser.parse_args(argv)
+
+    configs = [
+        TuneConfig(int(capacity_limit), int(queue_limit), consumer_fraction, priority_fraction)
+        for capacity_limit, queue_limit, consumer_fraction, priority_fraction in itertools.product(
+            _parse_list(args.capacity_limits, int),
+            _parse_list(args.queue_limits, int),
+            _parse_list(args.consumer_fractions, float),
+            _parse_list(args.priority_fractions, float),
+        )
+    ]
+    best, results = tune(
+        lambda: _open_trace(args.trace),
+        configs,
+        args.percentile,
+        args.max_wait,
+        args.saturation_concurrency,
+        args.goodput_tolerance,
+    )
+    for result in results:
+        print(_format(result, args.percentile))
+    if best is None:
+        print(f"No configuration keeps p{args.percentile:g} queue wait under {args.max_wait:g}s", file=sys.stderr)
+        return 1
+    print(f"best: {_format(best, args.percentile)}")
+    return 0
+
+
+def _format(result: ReplayResult, percentile: float) -> str:
+    config = result.config
+    return (
+        f"capacity_limit={config.capacity_limit} queue_limit={config.queue_limit} "
+        f"consumer_fraction={config.consumer_fraction:g} priority_fraction={config.priority_fraction:g} "
+        f"goodput={result.goodput:.2f}/s accepted={result.accepted} rejected={result.rejected} "
+        f"p{percentile:g}_wait={result.wait_percentile:.4f}s"
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,13 @@
-from typing import TypeVar, Dict
+import math
+import random
+from typing import AsyncIterable, AsyncIterator, Dict, Iterable, Optional, TypeVar, Union
+
+from .base import ThrottleResult
 
 T = TypeVar("T")
 
+_RETRY_AFTER_MULTIPLIERS: Dict[ThrottleResult, float] = {ThrottleResult.REJECTED_DUE_TO_CONSUMER_QUOTA: 4.0}
+
 
 def increment_counter(dictionary: Dict[T, int], key: T) -> None:
     value = dictionary.get(key)
@@ -19,3 +25,30 @@ def decrement_counter(dictionary: Dict[T, int], key: T) -> None:
         del dictionary[key]
     else:
         dictionary[key] = value - 1
+
+
+async def to_async_iterator(items: Union[Iterable[T], AsyncIterable[T]]) -> AsyncIterator[T]:
+    if isinstance(items, AsyncIterable):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+
+def retry_after(
+    result: ThrottleResult, time_to_capacity: float, jitter: float, max_retry_after: int, rnd: random.Random
+) -> int:
+    seconds = max(time_to_capacity, 1.0) * _RETRY_AFTER_MULTIPLIERS.get(result, 1.0)
+    seconds *= 1 + rnd.uniform(0, jitter)
+    return min(math.ceil(seconds), max_retry_after)
+
+
+def parse_timeout(value: Optional[str]) -> Optional[float]:
+    if value is None:
+        return None
+    try:
+        timeout = float(value)
+    except ValueError:
+        return None
+    return timeout if math.isfinite(timeout) else None
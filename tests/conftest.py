@@ -1,3 +1,35 @@
 import logging
 
+import pytest
+
+from aio_throttle import MetricsProvider
+
 logging.basicConfig(level="DEBUG")
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class RecordingMetricsProvider(MetricsProvider):
+    __slots__ = ("counters",)
+
+    def __init__(self):
+        self.counters = []
+
+    def increment_counter(self, name, tags, value=1):
+        self.counters.append((name, tags, value))
+
+
+@pytest.fixture
+def metrics_provider():
+    return RecordingMetricsProvider()
+
+
+@pytest.fixture
+def clock():
+    return Clock()
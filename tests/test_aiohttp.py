@@ -5,12 +5,13 @@ import aiohttp.web
 import aiohttp.web_request
 import aiohttp.web_response
 import pytest
+import pytest_asyncio
 import yarl
 
 import aio_throttle
 
 
-@pytest.fixture
+@pytest_asyncio.fixture
 async def server(aiohttp_client):
     async def handler(_: aiohttp.web_request.Request) -> aiohttp.web_response.Response:
         await asyncio.sleep(0.1)
@@ -35,6 +36,7 @@ async def server(aiohttp_client):
                 consumer_quotas=[],
                 priority_quotas=[],
                 ignored_paths={"/ignore"},
+                timeout_header_name="X-Request-Timeout",
                 metrics_provider=aio_throttle.PROMETHEUS_METRICS_PROVIDER,
             )
         ],
@@ -46,6 +48,7 @@ async def server(aiohttp_client):
     return await aiohttp_client(app)
 
 
+@pytest.mark.asyncio
 async def test_throttle(server):
     async with aiohttp.ClientSession() as client_session:
         url = yarl.URL(f"http://{server.server.host}:{server.server.port}/")
@@ -53,8 +56,11 @@ async def test_throttle(server):
         async with first, second:
             assert first.status == 200
             assert second.status == 429
+            assert second.headers["X-Throttled-Reason"] == str(aio_throttle.ThrottleResult.REJECTED_DUE_TO_FULL_QUEUE)
+            assert 1 <= int(second.headers["Retry-After"]) <= 60
 
 
+@pytest.mark.asyncio
 async def test_ignore_throttle_for_handler(server):
     async with aiohttp.ClientSession() as client_session:
         url = yarl.URL(f"http://{server.server.host}:{server.server.port}/ignore-handler")
@@ -64,6 +70,7 @@ async def test_ignore_throttle_for_handler(server):
             assert second.status == 200
 
 
+@pytest.mark.asyncio
 async def test_ignore_throttle_for_handler_by_set(server):
     async with aiohttp.ClientSession() as client_session:
         url = yarl.URL(f"http://{server.server.host}:{server.server.port}/ignore")
@@ -73,6 +80,7 @@ async def test_ignore_throttle_for_handler_by_set(server):
             assert second.status == 200
 
 
+@pytest.mark.asyncio
 async def test_ignore_throttle_for_view(server):
     async with aiohttp.ClientSession() as client_session:
         url = yarl.URL(f"http://{server.server.host}:{server.server.port}/ignore-view")
@@ -80,3 +88,223 @@ async def test_ignore_throttle_for_view(server):
         async with first, second:
             assert first.status == 200
             assert second.status == 200
+
+
+@pytest.mark.asyncio
+async def test_throttle_due_to_deadline(server):
+    async with aiohttp.ClientSession() as client_session:
+        url = yarl.URL(f"http://{server.server.host}:{server.server.port}/")
+        async with client_session.get(url, headers={"X-Request-Timeout": "1"}) as response:
+            assert response.status == 200
+        first = asyncio.ensure_future(client_session.get(url))
+        await asyncio.sleep(0.05)
+        async with client_session.get(url, headers={"X-Request-Timeout": "0.05"}) as response:
+            assert response.status == 429
+            assert response.headers["X-Throttled-Reason"] == "rejected due to deadline"
+        async with await first as response:
+            assert response.status == 200
+        async with client_session.get(url, headers={"X-Request-Timeout": "invalid"}) as response:
+            assert response.status == 200
+
+
+@pytest.mark.asyncio
+async def test_drain_on_shutdown(aiohttp_client):
+    async def handler(_: aiohttp.web_request.Request) -> aiohttp.web_response.Response:
+        return aiohttp.web_response.Response()
+
+    middleware = aio_throttle.aiohttp_middleware_factory(
+        capacity_limit=1, queue_limit=0, consumer_quotas=[], priority_quotas=[]
+    )
+    app = aiohttp.web.Application(middlewares=[middleware])
+    app.router.add_get("/", handler)
+    client = await aiohttp_client(app)
+
+    async with client.get("/") as response:
+        assert response.status == 200
+    await aio_throttle.aiohttp_drain_on_shutdown(middleware)(app)
+    async with client.get("/") as response:
+        assert response.status == 429
+        assert response.headers["X-Throttled-Reason"] == "rejected due to drain"
+        assert "Retry-After" not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_criticality_levels(aiohttp_client):
+    async def handler(_: aiohttp.web_request.Request) -> aiohttp.web_response.Response:
+        return aiohttp.web_response.Response()
+
+    levels = aio_throttle.ThrottleCriticalityLevels(
+        [aio_throttle.ThrottleCriticality("critical"), aio_throttle.ThrottleCriticality("sheddable", 0, 0)],
+        "critical",
+    )
+    middleware = aio_throttle.aiohttp_middleware_factory(
+        capacity_limit=1, queue_limit=0, consumer_quotas=[], priority_quotas=[], criticality_levels=levels
+    )
+    app = aiohttp.web.Application(middlewares=[middleware])
+    app.router.add_get("/", handler)
+    client = await aiohttp_client(app)
+
+    async with client.get("/", headers={"X-Request-Priority": "Critical"}) as response:
+        assert response.status == 200
+    async with client.get("/", headers={"X-Request-Priority": "sheddable"}) as response:
+        assert response.status == 429
+        assert response.headers["X-Throttled-Reason"] == "rejected due to priority quota"
+
+
+@pytest.mark.asyncio
+async def test_load_report(aiohttp_client):
+    async def handler(_: aiohttp.web_request.Request) -> aiohttp.web_response.Response:
+        await asyncio.sleep(0.1)
+        return aiohttp.web_response.Response()
+
+    middleware = aio_throttle.aiohttp_middleware_factory(
+        capacity_limit=2, queue_limit=0, consumer_quotas=[], priority_quotas=[], load_report_header_name="X-Load"
+    )
+    app = aiohttp.web.Application(middlewares=[middleware])
+    app.router.add_get("/", handler)
+    app.router.add_get("/load", aio_throttle.aiohttp_load_handler(middleware))
+    client = await aiohttp_client(app)
+
+    first, second, third = await asyncio.gather(client.get("/"), client.get("/"), client.get("/"))
+    async with first, second, third:
+        rejected = [response for response in (first, second, third) if response.status == 429]
+        assert len(rejected) == 1
+        assert rejected[0].headers["X-Load"] == "utilization=1.0, queue_size=0, rejection_rate=0.1"
+
+    async with client.get("/load") as response:
+        assert response.status == 200
+        load = await response.json()
+        assert load["utilization"] == 0.0
+        assert load["queue_size"] == 0
+        assert 0 < load["rejection_rate"] <= 0.1
+        assert response.headers["X-Load"] == f"utilization=0.0, queue_size=0, rejection_rate={load['rejection_rate']}"
+
+
+@pytest.mark.asyncio
+async def test_throttled_request(server):
+    throttler = aio_throttle.OutboundThrottler(1)
+    async with aiohttp.ClientSession() as client_session:
+        url = yarl.URL(f"http://{server.server.host}:{server.server.port}/ignore")
+
+        async def request():
+            async with aio_throttle.aiohttp_throttled_request(throttler, client_session, "GET", url) as (
+                result,
+                response,
+            ):
+                return result, None if response is None else response.status, list(throttler.stats)
+
+        first, second = await asyncio.gather(request(), request())
+        assert first == (aio_throttle.ThrottleResult.ACCEPTED, 200, [str(url.origin())])
+        assert second == (aio_throttle.ThrottleResult.REJECTED_DUE_TO_FULL_QUEUE, None, [str(url.origin())])
+        assert {} == throttler.stats
+
+
+@pytest_asyncio.fixture
+async def long_lived_server(aiohttp_client):
+    async def handler(_: aiohttp.web_request.Request) -> aiohttp.web_response.Response:
+        await asyncio.sleep(0.1)
+        return aiohttp.web_response.Response()
+
+    @aio_throttle.aiohttp_long_lived
+    async def websocket_handler(request: aiohttp.web_request.Request) -> aiohttp.web.WebSocketResponse:
+        ws = aiohttp.web.WebSocketResponse()
+        await ws.prepare(request)
+        async for _ in ws:
+            pass
+        return ws
+
+    async def stream_handler(request: aiohttp.web_request.Request) -> aiohttp.web_response.StreamResponse:
+        response = aiohttp.web_response.StreamResponse()
+        await response.prepare(request)
+        await asyncio.sleep(0.5)
+        await response.write_eof()
+        return response
+
+    app = aiohttp.web.Application(
+        middlewares=[
+            aio_throttle.aiohttp_middleware_factory(
+                capacity_limit=1,
+                queue_limit=0,
+                consumer_quotas=[],
+                priority_quotas=[],
+                long_lived_capacity_limit=2,
+            )
+        ],
+    )
+    app.on_response_prepare.append(aio_throttle.aiohttp_on_response_prepare)
+    app.router.add_get("/", handler)
+    app.router.add_get("/ws", websocket_handler)
+    app.router.add_get("/stream", stream_handler)
+    return await aiohttp_client(app)
+
+
+@pytest.mark.asyncio
+async def test_long_lived_websockets(long_lived_server):
+    async with long_lived_server.ws_connect("/ws"), long_lived_server.ws_connect("/ws"):
+        async with long_lived_server.get("/") as response:
+            assert response.status == 200
+        with pytest.raises(aiohttp.WSServerHandshakeError) as e:
+            await long_lived_server.ws_connect("/ws")
+        assert e.value.status == 429
+        assert e.value.headers["X-Throttled-Reason"] == "rejected due to full queue"
+
+
+@pytest.mark.asyncio
+async def test_long_lived_stream(long_lived_server):
+    async with long_lived_server.get("/stream") as stream_response:
+        assert stream_response.status == 200
+        async with long_lived_server.get("/") as response:
+            assert response.status == 200
+        await stream_response.read()
+
+
+@pytest.mark.asyncio
+async def test_long_lived_pool_exhausted_keeps_request_slot(long_lived_server):
+    async with long_lived_server.ws_connect("/ws"), long_lived_server.ws_connect("/ws"):
+        async with long_lived_server.get("/stream") as stream_response:
+            async with long_lived_server.get("/") as response:
+                assert response.status == 429
+            await stream_response.read()
+
+
+@pytest.mark.asyncio
+async def test_long_lived_pool_is_reported_and_drained(aiohttp_client, metrics_provider):
+    @aio_throttle.aiohttp_long_lived
+    async def websocket_handler(request: aiohttp.web_request.Request) -> aiohttp.web.WebSocketResponse:
+        ws = aiohttp.web.WebSocketResponse()
+        await ws.prepare(request)
+        async for _ in ws:
+            pass
+        return ws
+
+    middleware = aio_throttle.aiohttp_middleware_factory(
+        capacity_limit=1,
+        queue_limit=0,
+        consumer_quotas=[],
+        priority_quotas=[],
+        metrics_provider=metrics_provider,
+        long_lived_capacity_limit=1,
+    )
+    app = aiohttp.web.Application(middlewares=[middleware])
+    app.on_response_prepare.append(aio_throttle.aiohttp_on_response_prepare)
+    app.router.add_get("/ws", websocket_handler)
+    app.router.add_get("/load", aio_throttle.aiohttp_load_handler(middleware))
+    client = await aiohttp_client(app)
+
+    async with client.ws_connect("/ws"):
+        with pytest.raises(aiohttp.WSServerHandshakeError):
+            await client.ws_connect("/ws")
+        async with client.get("/load") as response:
+            load = await response.json()
+            assert load["long_lived_utilization"] == 1.0
+            assert 0 < load["long_lived_rejection_rate"] <= 0.1
+    assert (
+        "aio_throttle_long_lived_requests",
+        {"consumer": "unknown", "priority": "normal", "result": "rejected due to full queue"},
+        1,
+    ) in metrics_provider.counters
+
+    await aio_throttle.aiohttp_drain_on_shutdown(middleware)(app)
+    with pytest.raises(aiohttp.WSServerHandshakeError) as e:
+        await client.ws_connect("/ws")
+    assert e.value.headers["X-Throttled-Reason"] == "rejected due to drain"
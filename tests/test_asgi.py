@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+
+import aio_throttle
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "http":
+        await asyncio.sleep(0.1)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+
+def create_middleware(**kwargs):
+    return aio_throttle.asgi_middleware_factory(
+        app, capacity_limit=1, queue_limit=0, consumer_quotas=[], priority_quotas=[], **kwargs
+    )
+
+
+async def request(middleware, path="/", headers=None):
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": path, "headers": headers or []}
+    await middleware(scope, receive, send)
+    return messages[0]["status"], dict(messages[0]["headers"])
+
+
+@pytest.mark.asyncio
+async def test_throttle():
+    middleware = create_middleware()
+
+    (first_status, _), (second_status, second_headers) = await asyncio.gather(request(middleware), request(middleware))
+
+    assert first_status == 200
+    assert second_status == 429
+    assert second_headers[b"x-throttled-reason"] == b"rejected due to full queue"
+    assert 1 <= int(second_headers[b"retry-after"]) <= 60
+
+
+@pytest.mark.asyncio
+async def test_ignored_paths():
+    middleware = create_middleware(ignored_paths={"/ignore"})
+
+    results = await asyncio.gather(request(middleware, "/ignore"), request(middleware, "/ignore"))
+
+    assert [status for status, _ in results] == [200, 200]
+
+
+@pytest.mark.asyncio
+async def test_not_http_scope():
+    middleware = create_middleware()
+    called = []
+
+    async def receive():
+        return {"type": "lifespan.startup"}
+
+    async def send(message):
+        called.append(message)
+
+    await middleware({"type": "lifespan"}, receive, send)
+
+    assert called == []
+
+
+@pytest.mark.asyncio
+async def test_priority_header():
+    levels = aio_throttle.ThrottleCriticalityLevels(
+        [aio_throttle.ThrottleCriticality("critical"), aio_throttle.ThrottleCriticality("sheddable", 0, 0)],
+        "critical",
+    )
+    middleware = create_middleware(criticality_levels=levels)
+
+    assert (await request(middleware, headers=[(b"x-request-priority", b"Critical")]))[0] == 200
+    status, headers = await request(middleware, headers=[(b"x-request-priority", b"sheddable")])
+    assert status == 429
+    assert headers[b"x-throttled-reason"] == b"rejected due to priority quota"
+
+
+@pytest.mark.asyncio
+async def test_throttle_due_to_deadline():
+    middleware = create_middleware(timeout_header_name="X-Request-Timeout")
+
+    assert (await request(middleware))[0] == 200
+    first = asyncio.ensure_future(request(middleware))
+    await asyncio.sleep(0.01)
+    status, headers = await request(middleware, headers=[(b"x-request-timeout", b"0.01")])
+    assert (await first)[0] == 200
+    assert status == 429
+    assert headers[b"x-throttled-reason"] == b"rejected due to deadline"
+    assert (await request(middleware, headers=[(b"x-request-timeout", b"invalid")]))[0] == 200
@@ -0,0 +1,164 @@
+import asyncio
+
+import grpc
+import grpc.aio
+import pytest
+import pytest_asyncio
+
+import aio_throttle
+
+DELAY = 0.1
+
+
+async def unary(request, _):
+    await asyncio.sleep(DELAY)
+    return request
+
+
+async def unary_stream(request, _):
+    for _ in range(0, 2):
+        await asyncio.sleep(DELAY / 2)
+        yield request
+
+
+async def stream_unary(request_iterator, _):
+    return b"".join([request async for request in request_iterator])
+
+
+async def stream_stream_with_write(request_iterator, context):
+    async for request in request_iterator:
+        await asyncio.sleep(DELAY)
+        await context.write(request)
+
+
+def create_handler():
+    return grpc.method_handlers_generic_handler(
+        "test.Service",
+        {
+            "Unary": grpc.unary_unary_rpc_method_handler(unary),
+            "Ignored": grpc.unary_unary_rpc_method_handler(unary),
+            "UnaryStream": grpc.unary_stream_rpc_method_handler(unary_stream),
+            "StreamUnary": grpc.stream_unary_rpc_method_handler(stream_unary),
+            "StreamStream": grpc.stream_stream_rpc_method_handler(stream_stream_with_write),
+        },
+    )
+
+
+@pytest_asyncio.fixture
+async def channel():
+    async def create(**kwargs):
+        interceptor = aio_throttle.grpc_interceptor_factory(
+            capacity_limit=1,
+            queue_limit=0,
+            consumer_quotas=[],
+            priority_quotas=[],
+            ignored_methods={"/test.Service/Ignored"},
+            **kwargs,
+        )
+        server = grpc.aio.server(interceptors=[interceptor])
+        server.add_generic_rpc_handlers((create_handler(),))
+        port = server.add_insecure_port("127.0.0.1:0")
+        await server.start()
+        servers.append(server)
+        channel = grpc.aio.insecure_channel(f"127.0.0.1:{port}")
+        channels.append(channel)
+        return channel
+
+    servers, channels = [], []
+    yield create
+    for channel in channels:
+        await channel.close()
+    for server in servers:
+        await server.stop(None)
+
+
+async def call(callable_, request, metadata=None):
+    try:
+        return await callable_(request, metadata=metadata)
+    except grpc.aio.AioRpcError as e:
+        return e
+
+
+@pytest.mark.asyncio
+async def test_unary(channel):
+    method = (await channel()).unary_unary("/test.Service/Unary")
+
+    results = await asyncio.gather(call(method, b"first"), call(method, b"second"))
+
+    assert 1 == len([result for result in results if isinstance(result, bytes)])
+    second = next(result for result in results if not isinstance(result, bytes))
+    assert second.code() == grpc.StatusCode.RESOURCE_EXHAUSTED
+    assert second.details() == "rejected due to full queue"
+    assert second.trailing_metadata()["x-throttled-reason"] == "rejected due to full queue"
+
+
+@pytest.mark.asyncio
+async def test_ignored_method(channel):
+    method = (await channel()).unary_unary("/test.Service/Ignored")
+
+    assert [b"first", b"second"] == await asyncio.gather(call(method, b"first"), call(method, b"second"))
+
+
+@pytest.mark.asyncio
+async def test_priority_metadata(channel):
+    levels = aio_throttle.ThrottleCriticalityLevels(
+        [aio_throttle.ThrottleCriticality("critical"), aio_throttle.ThrottleCriticality("sheddable", 0, 0)],
+        "critical",
+    )
+    method = (await channel(criticality_levels=levels)).unary_unary("/test.Service/Unary")
+
+    assert b"first" == await call(method, b"first", (("x-request-priority", "Critical"),))
+    rejected = await call(method, b"second", (("x-request-priority", "sheddable"),))
+    assert rejected.code() == grpc.StatusCode.RESOURCE_EXHAUSTED
+    assert rejected.details() == "rejected due to priority quota"
+
+
+@pytest.mark.asyncio
+async def test_streaming_holds_slot(channel):
+    created = await channel()
+    unary_stream_method = created.unary_stream("/test.Service/UnaryStream")
+    unary_method = created.unary_unary("/test.Service/Unary")
+
+    stream = unary_stream_method(b"stream")
+    assert b"stream" == await stream.read()
+    rejected = await call(unary_method, b"unary")
+    assert rejected.code() == grpc.StatusCode.RESOURCE_EXHAUSTED
+    assert b"stream" == await stream.read()
+    assert grpc.StatusCode.OK == await stream.code()
+
+    assert b"unary" == await call(unary_method, b"unary")
+
+
+@pytest.mark.asyncio
+async def test_streaming_capacity_limit(channel):
+    created = await channel(streaming_capacity_limit=1)
+    unary_method = created.unary_unary("/test.Service/Unary")
+    stream_unary_method = created.stream_unary("/test.Service/StreamUnary")
+    stream_stream_method = created.stream_stream("/test.Service/StreamStream")
+
+    stream = stream_stream_method()
+    await stream.write(b"stream")
+    assert b"stream" == await stream.read()
+
+    rejected = await call(stream_unary_method, iter([b"a", b"b"]))
+    assert rejected.code() == grpc.StatusCode.RESOURCE_EXHAUSTED
+    assert b"unary" == await call(unary_method, b"unary")
+
+    await stream.done_writing()
+    assert grpc.StatusCode.OK == await stream.code()
+    assert b"ab" == await call(stream_unary_method, iter([b"a", b"b"]))
+
+
+@pytest.mark.asyncio
+async def test_deadline_after_stream(channel):
+    created = await channel(deadline_admission=True)
+    unary_stream_method = created.unary_stream("/test.Service/UnaryStream")
+    unary_method = created.unary_unary("/test.Service/Unary")
+
+    stream = unary_stream_method(b"stream", timeout=10)
+    assert b"stream" == await stream.read()
+    await asyncio.sleep(5 * DELAY)
+    assert b"stream" == await stream.read()
+    assert grpc.StatusCode.OK == await stream.code()
+
+    assert b"unary" == await unary_method(b"unary", timeout=3 * DELAY)
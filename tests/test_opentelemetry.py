@@ -0,0 +1,37 @@
+import asyncio
+
+import pytest
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+from aio_throttle import OPENTELEMETRY_THROTTLE_LISTENER, Throttler, ThrottlePriority
+
+DELAY = 0.1
+
+
+@pytest.mark.asyncio
+async def test_span_events():
+    exporter = InMemorySpanExporter()
+    tracer_provider = TracerProvider()
+    tracer_provider.add_span_processor(SimpleSpanProcessor(exporter))
+    tracer = tracer_provider.get_tracer(__name__)
+    throttler = Throttler(1, 0, listeners=[OPENTELEMETRY_THROTTLE_LISTENER])
+
+    async def handle(name):
+        with tracer.start_as_current_span(name):
+            async with throttler.throttle(consumer="consumer", priority=ThrottlePriority.LOW) as result:
+                if result:
+                    await asyncio.sleep(DELAY)
+
+    await asyncio.gather(handle("first"), handle("second"))
+
+    spans = {span.name: span for span in exporter.get_finished_spans()}
+    assert [event.name for event in spans["first"].events] == ["aio_throttle.acquired", "aio_throttle.released"]
+    assert [event.name for event in spans["second"].events] == ["aio_throttle.rejected"]
+
+    acquired, released = spans["first"].events
+    assert acquired.attributes["aio_throttle.consumer"] == "consumer"
+    assert acquired.attributes["aio_throttle.priority"] == "low"
+    assert released.attributes["aio_throttle.hold_time"] >= DELAY
+    assert spans["second"].events[0].attributes["aio_throttle.result"] == "rejected due to full queue"
@@ -1,6 +1,16 @@
+import math
+
 import pytest
 
-from aio_throttle import MaxFractionCapacityQuota
+from aio_throttle import (
+    MaxFractionCapacityQuota,
+    MaxFractionDecayedUsageQuota,
+    Throttler,
+    ThrottleResult,
+    RandomEarlyDetectionThrottleQuota,
+    RandomRejectThrottleQuota,
+    ThrottlePriority,
+)
 
 
 @pytest.mark.parametrize(
@@ -62,3 +72,126 @@ def test_max_fraction_consumer_quota_not_match(max_fraction, used, limit, accept
     assert accept == MaxFractionCapacityQuota(max_fraction, "consumer").can_be_accepted(
         "yet_another_consumer", used, limit
     )
+
+
+@pytest.mark.parametrize("reject_probability, accept", [(0, True), (1, False)])
+def test_random_reject_quota(reject_probability, accept):
+    quota = RandomRejectThrottleQuota(reject_probability)
+    assert all(accept == quota.can_be_accepted() for _ in range(0, 100))
+
+
+def test_random_reject_quota_probability():
+    quota = RandomRejectThrottleQuota(0.2, 0)
+    accepted = sum(quota.can_be_accepted() for _ in range(0, 10000))
+    assert 7800 <= accepted <= 8200
+
+
+@pytest.mark.parametrize(
+    "low_watermark, priority, used, limit, queue_size, queue_limit, accept",
+    [
+        (0.5, None, 0, 100, 0, 100, True),
+        (0.5, None, 100, 100, 0, 100, True),
+        (0.5, None, 100, 100, 100, 100, False),
+        (0, None, 100, 100, 0, 0, False),
+        (0.5, ThrottlePriority.HIGH, 100, 100, 99, 100, True),
+        (0.5, ThrottlePriority.LOW, 100, 100, 50, 100, False),
+        (0.5, ThrottlePriority.NORMAL, 100, 100, 100, 100, False),
+    ],
+)
+def test_random_early_detection_quota_bounds(low_watermark, priority, used, limit, queue_size, queue_limit, accept):
+    quota = RandomEarlyDetectionThrottleQuota(
+        low_watermark, {ThrottlePriority.HIGH: 0, ThrottlePriority.LOW: 2}, seed=0
+    )
+    assert all(accept == quota.can_be_accepted(priority, used, limit, queue_size, queue_limit) for _ in range(0, 100))
+
+
+@pytest.mark.parametrize("queue_size, reject_probability", [(0, 0), (25, 0.25), (50, 0.5), (75, 0.75), (100, 1)])
+def test_random_early_detection_quota_ramp(queue_size, reject_probability):
+    quota = RandomEarlyDetectionThrottleQuota(0.5, seed=0)
+    accepted = sum(quota.can_be_accepted(None, 100, 100, queue_size, 100) for _ in range(0, 10000))
+    assert abs(accepted / 10000 - (1 - reject_probability)) <= 0.02
+
+
+def test_random_early_detection_quota_invalid_low_watermark():
+    with pytest.raises(ValueError):
+        RandomEarlyDetectionThrottleQuota(1)
+
+
+@pytest.mark.parametrize(
+    "max_fraction, hold_time, elapsed, accept",
+    [
+        (0.5, 0, 0, True),
+        (0.5, 5, 0, True),
+        (0.5, 6, 0, False),
+        (0.5, 6, 1, True),
+        (0.5, 100, 1, False),
+        (0.5, 100, 10, True),
+    ],
+)
+def test_max_fraction_decayed_usage_quota(max_fraction, hold_time, elapsed, accept, clock):
+    # the decayed capacity-time of 10 slots with the half-life of ln(2) seconds is 10 slot-seconds, so 0.5 is 5
+    quota = MaxFractionDecayedUsageQuota(max_fraction, math.log(2), clock=clock)
+    quota.on_released("consumer", hold_time)
+    clock.now = elapsed
+
+    assert accept == quota.can_be_accepted("consumer", 1, 10)
+    assert quota.can_be_accepted("yet_another_consumer", 1, 10)
+
+
+def test_max_fraction_decayed_usage_quota_not_match(clock):
+    quota = MaxFractionDecayedUsageQuota(0.1, 1, "consumer", clock=clock)
+    quota.on_released("yet_another_consumer", 100)
+    assert quota.can_be_accepted("yet_another_consumer", 1, 10)
+
+    quota.on_released("consumer", 100)
+    assert not quota.can_be_accepted("consumer", 1, 10)
+
+
+def test_max_fraction_decayed_usage_quota_evicts_decayed_usages(clock):
+    quota = MaxFractionDecayedUsageQuota(0.5, 1, clock=clock)
+    for consumer in range(0, 1000):
+        quota.on_released(consumer, 1)
+    assert len(quota._usages) == 1000
+
+    clock.now = 20
+    for _ in range(0, 1000):
+        quota.on_released("consumer", 1)
+    assert list(quota._usages) == ["consumer"]
+
+
+@pytest.mark.asyncio
+async def test_max_fraction_decayed_usage_quota_workload(clock):
+    throttler = Throttler(
+        10, consumer_quotas=[MaxFractionDecayedUsageQuota(0.1, math.log(2), clock=clock)], clock=clock
+    )
+
+    async with throttler.throttle(consumer="slow") as result:
+        assert result == ThrottleResult.ACCEPTED
+        clock.now += 2
+
+    async with throttler.throttle(consumer="slow") as result:
+        assert result == ThrottleResult.REJECTED_DUE_TO_CONSUMER_QUOTA
+    async with throttler.throttle(consumer="fast") as result:
+        assert result == ThrottleResult.ACCEPTED
+
+    clock.now += 1
+    async with throttler.throttle(consumer="slow") as result:
+        assert result == ThrottleResult.ACCEPTED
+
+
+@pytest.mark.asyncio
+async def test_max_fraction_decayed_usage_quota_long_hold_after_short_holds(clock):
+    throttler = Throttler(
+        10, consumer_quotas=[MaxFractionDecayedUsageQuota(0.1, math.log(2), clock=clock)], clock=clock
+    )
+    for _ in range(0, 20):
+        async with throttler.throttle(consumer="slow") as result:
+            assert result == ThrottleResult.ACCEPTED
+            clock.now += 0.005
+
+    async with throttler.throttle(consumer="slow") as result:
+        assert result == ThrottleResult.ACCEPTED
+        clock.now += 5
+
+    async with throttler.throttle(consumer="slow") as result:
+        assert result == ThrottleResult.REJECTED_DUE_TO_CONSUMER_QUOTA
@@ -0,0 +1,112 @@
+import asyncio
+import collections
+
+import pytest
+
+from aio_throttle import ThrottleCriticality, ThrottleCriticalityLevels, ThrottleResult, Throttler
+
+DELAY = 0.1
+
+LEVELS = ThrottleCriticalityLevels(
+    [
+        ThrottleCriticality("critical_plus"),
+        ThrottleCriticality("critical"),
+        ThrottleCriticality("sheddable_plus", queue_fraction=0.5, capacity_fraction=0.5),
+        ThrottleCriticality("sheddable", queue_fraction=0, capacity_fraction=0.25),
+    ],
+    default="critical",
+)
+
+
+class Server:
+    def __init__(self, delay, throttler):
+        self.throttler = throttler
+        self.delay = delay
+
+    async def handle(self, priority):
+        async with self.throttler.throttle(priority=priority) as result:
+            if result:
+                await asyncio.sleep(self.delay)
+            return result
+
+
+@pytest.mark.parametrize(
+    "value, index",
+    [
+        (None, 1),
+        ("critical_plus", 0),
+        ("SHEDDABLE", 3),
+        ("unknown", 1),
+        (2, 2),
+    ],
+)
+def test_parse(value, index):
+    assert index == LEVELS.parse(value)
+
+
+def test_parse_out_of_range():
+    with pytest.raises(ValueError):
+        LEVELS.parse(4)
+
+
+@pytest.mark.parametrize(
+    "levels, default",
+    [
+        ([], "critical"),
+        ([ThrottleCriticality("critical"), ThrottleCriticality("Critical")], "critical"),
+        ([ThrottleCriticality("critical")], "sheddable"),
+    ],
+)
+def test_invalid_levels(levels, default):
+    with pytest.raises(ValueError):
+        ThrottleCriticalityLevels(levels, default)
+
+
+@pytest.mark.parametrize("queue_fraction, capacity_fraction", [(-0.1, 1), (1.1, 1), (1, -0.1), (1, 1.1)])
+def test_invalid_level(queue_fraction, capacity_fraction):
+    with pytest.raises(ValueError):
+        ThrottleCriticality("critical", queue_fraction, capacity_fraction)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "priority, accepted",
+    [
+        ("critical_plus", 4),
+        ("critical", 4),
+        ("sheddable_plus", 2),
+        (3, 1),
+    ],
+)
+async def test_capacity_fraction(priority, accepted):
+    server = Server(DELAY, Throttler(4, criticality_levels=LEVELS))
+
+    results = await asyncio.gather(*[server.handle(priority) for _ in range(0, 4)])
+
+    assert collections.Counter(results) == collections.Counter(
+        {ThrottleResult.ACCEPTED: accepted, ThrottleResult.REJECTED_DUE_TO_PRIORITY_QUOTA: 4 - accepted}
+    )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "priority, result",
+    [
+        ("critical_plus", ThrottleResult.ACCEPTED),
+        ("critical", ThrottleResult.ACCEPTED),
+        ("sheddable_plus", ThrottleResult.REJECTED_DUE_TO_FULL_QUEUE),
+        ("sheddable", ThrottleResult.REJECTED_DUE_TO_FULL_QUEUE),
+    ],
+)
+async def test_queue_fraction(priority, result):
+    throttler = Throttler(4, 4, criticality_levels=LEVELS)
+    server = Server(DELAY, throttler)
+
+    tasks = [asyncio.ensure_future(server.handle("critical")) for _ in range(0, 6)]
+    await asyncio.sleep(0)
+    assert {"critical": 4} == throttler.stats.priorities_used_capacity
+    assert 2 == throttler.stats.queue_size
+
+    assert result == await server.handle(priority)
+    assert all(await asyncio.gather(*tasks))
+    assert {} == throttler.stats.priorities_used_capacity
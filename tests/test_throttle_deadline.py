@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+
+from aio_throttle import Throttler, ThrottleResult
+
+DELAY = 0.1
+
+
+class Server:
+    def __init__(self, delay, throttler):
+        self.throttler = throttler
+        self.delay = delay
+
+    async def handle(self, timeout=None):
+        async with self.throttler.throttle(timeout=timeout) as result:
+            if result:
+                await asyncio.sleep(self.delay)
+            return result
+
+
+@pytest.mark.asyncio
+async def test_reject_upfront(clock):
+    throttler = Throttler(1, 10, clock=clock)
+    for _ in range(0, 30):
+        async with throttler.throttle() as result:
+            assert result
+            clock.now += DELAY
+    assert throttler.estimated_service_time == pytest.approx(DELAY)
+
+    async with throttler.throttle(timeout=DELAY / 2) as result:
+        assert result == ThrottleResult.ACCEPTED
+        async with throttler.throttle(timeout=DELAY / 2) as rejected:
+            assert rejected == ThrottleResult.REJECTED_DUE_TO_DEADLINE
+
+
+@pytest.mark.asyncio
+async def test_accept_with_free_capacity_after_long_hold(clock):
+    throttler = Throttler(128, 512, clock=clock)
+    async with throttler.throttle():
+        clock.now += 60
+    for _ in range(0, 5):
+        async with throttler.throttle():
+            clock.now += 0.01
+
+    assert throttler.estimated_service_time > 2.0
+    async with throttler.throttle(timeout=2.0) as result:
+        assert result == ThrottleResult.ACCEPTED
+
+
+@pytest.mark.asyncio
+async def test_first_hold_is_estimated_service_time(clock):
+    throttler = Throttler(1, clock=clock)
+    assert throttler.estimated_service_time == 0
+    async with throttler.throttle():
+        clock.now += 1
+
+    assert throttler.estimated_service_time == 1
+
+
+@pytest.mark.asyncio
+async def test_long_lived_hold_is_not_estimated_service_time(clock):
+    throttler = Throttler(1, clock=clock)
+    for _ in range(0, 30):
+        async with throttler.throttle():
+            clock.now += 0.01
+    async with throttler.throttle(long_lived=True):
+        clock.now += 60
+
+    assert throttler.estimated_service_time == pytest.approx(0.01)
+
+
+@pytest.mark.asyncio
+async def test_reject_queued_waiter_when_deadline_passes():
+    server = Server(3 * DELAY, Throttler(1, 10))
+
+    first = asyncio.ensure_future(server.handle())
+    await asyncio.sleep(0)
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    assert await server.handle(DELAY) == ThrottleResult.REJECTED_DUE_TO_DEADLINE
+    assert DELAY <= loop.time() - start <= 1.5 * DELAY
+    assert server.throttler.stats.queue_size == 0
+
+    assert await first == ThrottleResult.ACCEPTED
+    assert server.throttler.stats.available_capacity == 1
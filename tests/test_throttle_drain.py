@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+
+from aio_throttle import Throttler, ThreadSafeThrottler, ThrottleResult
+
+DELAY = 0.2
+
+
+class Server:
+    def __init__(self, delay, throttler):
+        self.throttler = throttler
+        self.delay = delay
+
+    async def handle(self):
+        async with self.throttler.throttle() as result:
+            if result:
+                await asyncio.sleep(self.delay)
+            return result
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("throttler_type", [Throttler, ThreadSafeThrottler])
+async def test_drain(throttler_type):
+    server = Server(DELAY, throttler_type(1, 5))
+    loop = asyncio.get_running_loop()
+
+    holder = asyncio.ensure_future(server.handle())
+    await asyncio.sleep(0)
+    waiters = [asyncio.ensure_future(server.handle()) for _ in range(0, 3)]
+    await asyncio.sleep(0)
+    assert server.throttler.stats.queue_size == 3
+
+    start = loop.time()
+    drain = asyncio.ensure_future(server.throttler.drain(1))
+    assert await asyncio.gather(*waiters) == [ThrottleResult.REJECTED_DUE_TO_DRAIN] * 3
+    assert loop.time() - start < DELAY / 2
+    assert await server.handle() == ThrottleResult.REJECTED_DUE_TO_DRAIN
+
+    assert await drain
+    assert DELAY / 2 <= loop.time() - start <= 1.5 * DELAY
+    assert await holder == ThrottleResult.ACCEPTED
+    assert server.throttler.stats.available_capacity == 1
+
+
+@pytest.mark.asyncio
+async def test_drain_timeout():
+    server = Server(5 * DELAY, Throttler(1))
+
+    holder = asyncio.ensure_future(server.handle())
+    await asyncio.sleep(0)
+    assert not await server.throttler.drain(DELAY)
+    assert await holder == ThrottleResult.ACCEPTED
+
+
+@pytest.mark.asyncio
+async def test_drain_idle():
+    throttler = Throttler(1)
+    assert await throttler.drain(0)
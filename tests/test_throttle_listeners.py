@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+
+from aio_throttle import MaxFractionCapacityQuota, Throttler, ThrottleListener, ThrottlePriority, ThrottleResult
+
+DELAY = 0.1
+
+
+class RecordingListener(ThrottleListener):
+    __slots__ = ("events",)
+
+    def __init__(self):
+        self.events = []
+
+    def on_enqueued(self, consumer, priority):
+        self.events.append(("enqueued", consumer, priority))
+
+    def on_acquired(self, consumer, priority, wait_time):
+        self.events.append(("acquired", consumer, priority, wait_time))
+
+    def on_released(self, consumer, priority, hold_time):
+        self.events.append(("released", consumer, priority, hold_time))
+
+    def on_rejected(self, consumer, priority, result):
+        self.events.append(("rejected", consumer, priority, result))
+
+
+class Server:
+    def __init__(self, delay, throttler):
+        self.throttler = throttler
+        self.delay = delay
+
+    async def handle(self, consumer):
+        async with self.throttler.throttle(consumer=consumer, priority=ThrottlePriority.HIGH) as result:
+            if result:
+                await asyncio.sleep(self.delay)
+
+
+@pytest.mark.asyncio
+async def test_lifecycle():
+    listener = RecordingListener()
+    server = Server(DELAY, Throttler(1, 1, listeners=[listener]))
+
+    await asyncio.gather(server.handle("first"), server.handle("second"), server.handle("third"))
+
+    high = ThrottlePriority.HIGH
+    assert [event[:3] for event in listener.events] == [
+        ("acquired", "first", high),
+        ("enqueued", "second", high),
+        ("rejected", "third", high),
+        ("released", "first", high),
+        ("acquired", "second", high),
+        ("released", "second", high),
+    ]
+    assert listener.events[0][3] < 0.01
+    assert listener.events[2][3] == ThrottleResult.REJECTED_DUE_TO_FULL_QUEUE
+    assert DELAY <= listener.events[3][3] <= 1.5 * DELAY
+    assert DELAY <= listener.events[4][3] <= 1.5 * DELAY
+    assert DELAY <= listener.events[5][3] <= 1.5 * DELAY
+
+
+@pytest.mark.asyncio
+async def test_rejected_by_quota_after_waiting():
+    listener = RecordingListener()
+    throttler = Throttler(2, 2, consumer_quotas=[MaxFractionCapacityQuota(0.5, "first")], listeners=[listener])
+    server = Server(DELAY, throttler)
+
+    await asyncio.gather(
+        server.handle("second"), server.handle("second"), server.handle("first"), server.handle("first")
+    )
+
+    assert [event[:2] for event in listener.events if event[0] != "released"] == [
+        ("acquired", "second"),
+        ("acquired", "second"),
+        ("enqueued", "first"),
+        ("enqueued", "first"),
+        ("acquired", "first"),
+        ("rejected", "first"),
+    ]
+    assert listener.events[-2][3] == ThrottleResult.REJECTED_DUE_TO_CONSUMER_QUOTA
+
+
+@pytest.mark.asyncio
+async def test_composite_listener():
+    first_listener, second_listener = RecordingListener(), RecordingListener()
+    server = Server(DELAY, Throttler(1, listeners=[first_listener, second_listener]))
+
+    await asyncio.gather(server.handle("first"), server.handle("second"))
+
+    assert [event[0] for event in first_listener.events] == ["acquired", "rejected", "released"]
+    assert first_listener.events == second_listener.events
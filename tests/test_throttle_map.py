@@ -0,0 +1,83 @@
+import asyncio
+import random
+
+import pytest
+
+from aio_throttle import MaxFractionCapacityQuota, Throttler, ThrottleResult
+
+DELAY = 0.01
+
+
+class Worker:
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def handle(self, item):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(random.uniform(0, DELAY))
+            return item * 2
+        finally:
+            self.in_flight -= 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("capacity_limit, items_count", [(1, 10), (4, 100), (16, 1000)])
+async def test_ordered(capacity_limit, items_count):
+    worker = Worker()
+    throttler = Throttler(capacity_limit)
+
+    results = [x async for x in throttler.map(worker.handle, range(0, items_count), ordered=True)]
+
+    assert results == [(x, ThrottleResult.ACCEPTED, x * 2) for x in range(0, items_count)]
+    assert worker.max_in_flight == min(capacity_limit, items_count)
+
+
+@pytest.mark.asyncio
+async def test_unordered_consumes_source_lazily():
+    worker = Worker()
+    throttler = Throttler(4)
+    pulled = 0
+
+    async def source():
+        nonlocal pulled
+        for x in range(0, 100):
+            pulled += 1
+            yield x
+
+    results = []
+    async for item, result, value in throttler.map(worker.handle, source()):
+        assert pulled - len(results) <= 4
+        results.append(value)
+
+    assert sorted(results) == [x * 2 for x in range(0, 100)]
+    assert worker.max_in_flight == 4
+
+
+@pytest.mark.asyncio
+async def test_consumer_quota():
+    worker = Worker()
+    throttler = Throttler(4, 0, [MaxFractionCapacityQuota(0.5, "first")])
+
+    results = [x async for x in throttler.map(worker.handle, range(0, 4), consumer=lambda x: "first", concurrency=4)]
+
+    assert sorted(result for _, result, _ in results) == sorted(
+        [ThrottleResult.ACCEPTED] * 2 + [ThrottleResult.REJECTED_DUE_TO_CONSUMER_QUOTA] * 2
+    )
+
+
+@pytest.mark.asyncio
+async def test_close_cancels_pending():
+    throttler = Throttler(2)
+
+    async def handle(item):
+        await asyncio.sleep(10)
+
+    results = throttler.map(handle, range(0, 10))
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(results.__anext__(), DELAY)
+    await results.aclose()
+
+    assert throttler.stats.available_capacity == 2
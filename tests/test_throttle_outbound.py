@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from aio_throttle import OutboundThrottler, ThrottleResult
+
+DELAY = 0.1
+
+
+class Client:
+    def __init__(self, delay, throttler):
+        self.throttler = throttler
+        self.delay = delay
+
+    async def call(self, host, priority=None):
+        async with self.throttler.throttle(host, priority=priority) as result:
+            if result:
+                await asyncio.sleep(self.delay)
+            return result
+
+
+@pytest.mark.asyncio
+async def test_pool_per_host():
+    throttler = OutboundThrottler(1, 1)
+    client = Client(DELAY, throttler)
+
+    tasks = [
+        asyncio.ensure_future(client.call("http://a")),
+        asyncio.ensure_future(client.call("http://a")),
+        asyncio.ensure_future(client.call("http://a")),
+        asyncio.ensure_future(client.call("http://b")),
+    ]
+    await asyncio.sleep(0)
+    assert {"http://a", "http://b"} == throttler.stats.keys()
+    assert throttler.stats["http://a"].queue_size == 1
+    results = await asyncio.gather(*tasks)
+
+    assert results == [
+        ThrottleResult.ACCEPTED,
+        ThrottleResult.ACCEPTED,
+        ThrottleResult.REJECTED_DUE_TO_FULL_QUEUE,
+        ThrottleResult.ACCEPTED,
+    ]
+    assert {} == throttler.stats
+
+
+@pytest.mark.asyncio
+async def test_low_priority_is_not_queued():
+    client = Client(DELAY, OutboundThrottler(1, 2))
+
+    results = await asyncio.gather(client.call("http://a"), client.call("http://a"), client.call("http://a", "low"))
+
+    assert results == [ThrottleResult.ACCEPTED, ThrottleResult.ACCEPTED, ThrottleResult.REJECTED_DUE_TO_FULL_QUEUE]
+
+
+@pytest.mark.asyncio
+async def test_metrics(metrics_provider):
+    client = Client(DELAY, OutboundThrottler(1, metrics_provider=metrics_provider))
+
+    await asyncio.gather(client.call("http://a"), client.call("http://a"))
+
+    assert metrics_provider.counters == [
+        (
+            "aio_throttle_outbound_requests",
+            {"host": "http://a", "priority": "normal", "result": "rejected due to full queue"},
+            1,
+        )
+    ]
+
+
+def test_invalid_limits():
+    with pytest.raises(ValueError):
+        OutboundThrottler(0)
+    with pytest.raises(ValueError):
+        OutboundThrottler(1, -1)
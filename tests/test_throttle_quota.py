@@ -4,7 +4,7 @@ import logging
 import time
 import pytest
 
-from aio_throttle import Throttler, RandomRejectThrottleQuota
+from aio_throttle import Throttler, RandomRejectThrottleQuota, RandomEarlyDetectionThrottleQuota, ThrottlePriority
 
 DELAY = 1
 SUCCEED = "+"
@@ -18,8 +18,8 @@ class Server:
         self.throttler = throttler
         self.delay = delay
 
-    async def handle(self):
-        async with self.throttler.throttle() as result:
+    async def handle(self, priority=None):
+        async with self.throttler.throttle(priority=priority) as result:
             if not result:
                 return FAILED
             await asyncio.sleep(self.delay)
@@ -29,7 +29,7 @@ class Server:
 @pytest.mark.asyncio
 @pytest.mark.parametrize(
     "capacity_limit, reject_probability, succeed_count, failed_count, multiplier",
-    [(2, 0.5, 2, 2, 1), (1, 0.5, 1, 3, 1)],
+    [(2, 0.5, 2, 2, 1), (1, 0.5, 1, 3, 1), (2, 0, 2, 2, 1)],
 )
 async def test(capacity_limit, reject_probability, succeed_count, failed_count, multiplier):
     throttler = Throttler(capacity_limit, 0, [], [], [RandomRejectThrottleQuota(reject_probability, 0)])
@@ -45,3 +45,27 @@ async def test(capacity_limit, reject_probability, succeed_count, failed_count,
     assert counter[SUCCEED] == succeed_count
     assert counter[FAILED] == failed_count
     assert multiplier * DELAY <= end - start <= (1.1 * multiplier * DELAY)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "capacity_limit, queue_limit, low_watermark, succeed_count, failed_count, multiplier",
+    [(2, 2, 0.5, 3, 1, 2), (2, 2, 0.75, 4, 0, 2), (4, 0, 0.5, 3, 1, 1)],
+)
+async def test_random_early_detection(
+    capacity_limit, queue_limit, low_watermark, succeed_count, failed_count, multiplier
+):
+    quota = RandomEarlyDetectionThrottleQuota(low_watermark, {ThrottlePriority.NORMAL: 4}, seed=0)
+    throttler = Throttler(capacity_limit, queue_limit, load_quotas=[quota])
+    server = Server(DELAY, throttler)
+
+    handle_tasks = [server.handle(ThrottlePriority.NORMAL) for _ in range(0, succeed_count + failed_count)]
+
+    start = time.monotonic()
+    statuses = await asyncio.gather(*handle_tasks)
+    end = time.monotonic()
+
+    counter = collections.Counter(statuses)
+    assert counter[SUCCEED] == succeed_count
+    assert counter[FAILED] == failed_count
+    assert multiplier * DELAY <= end - start <= (1.1 * multiplier * DELAY)
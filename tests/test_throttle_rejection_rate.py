@@ -0,0 +1,21 @@
+import pytest
+
+from aio_throttle import Throttler
+
+
+@pytest.mark.asyncio
+async def test_rejection_rate():
+    throttler = Throttler(1)
+    assert 0 == throttler.rejection_rate
+
+    async with throttler.throttle() as first:
+        assert first
+        for _ in range(0, 10):
+            async with throttler.throttle() as result:
+                assert not result
+    rejection_rate = throttler.rejection_rate
+    assert 0.6 < rejection_rate < 0.7
+
+    async with throttler.throttle() as result:
+        assert result
+    assert throttler.rejection_rate == pytest.approx(0.9 * rejection_rate)
@@ -0,0 +1,83 @@
+import asyncio
+import random
+
+import pytest
+
+from aio_throttle import Throttler, ThrottleResult
+from aio_throttle.utils import retry_after
+
+DELAY = 0.1
+
+
+class Server:
+    def __init__(self, delay, throttler):
+        self.throttler = throttler
+        self.delay = delay
+
+    async def handle(self):
+        async with self.throttler.throttle() as result:
+            if not result:
+                return result
+            await asyncio.sleep(self.delay)
+            return result
+
+
+@pytest.mark.asyncio
+async def test_estimated_time_to_capacity():
+    throttler = Throttler(1, 10)
+    server = Server(DELAY, throttler)
+    assert throttler.estimated_time_to_capacity == 0
+
+    tasks = [asyncio.ensure_future(server.handle()) for _ in range(0, 5)]
+    await asyncio.sleep(3.5 * DELAY)
+    assert DELAY / 2 <= throttler.estimated_time_to_capacity <= 10 * DELAY
+    await asyncio.gather(*tasks)
+
+    assert throttler.estimated_time_to_capacity == 0
+
+
+@pytest.mark.parametrize(
+    "result, time_to_capacity, expected",
+    [
+        (ThrottleResult.REJECTED_DUE_TO_FULL_QUEUE, 0, 1),
+        (ThrottleResult.REJECTED_DUE_TO_FULL_QUEUE, 2.5, 3),
+        (ThrottleResult.REJECTED_DUE_TO_CONSUMER_QUOTA, 0, 4),
+        (ThrottleResult.REJECTED_DUE_TO_CONSUMER_QUOTA, 2.5, 10),
+        (ThrottleResult.REJECTED_DUE_TO_QUOTA, 100, 60),
+    ],
+)
+def test_retry_after_without_jitter(result, time_to_capacity, expected):
+    assert expected == retry_after(result, time_to_capacity, 0, 60, random.Random(0))
+
+
+def test_retry_after_with_jitter():
+    rnd = random.Random(0)
+    values = {retry_after(ThrottleResult.REJECTED_DUE_TO_FULL_QUEUE, 10, 0.5, 60, rnd) for _ in range(0, 100)}
+    assert min(values) >= 10
+    assert max(values) <= 15
+    assert len(values) > 1
+
+
+@pytest.mark.asyncio
+async def test_estimated_time_to_capacity_ignores_idle_period(clock):
+    throttler = Throttler(1, 1, clock=clock)
+    async with throttler.throttle():
+        clock.now += DELAY
+
+    clock.now += 3600
+    estimates = []
+
+    async def wait():
+        async with throttler.throttle() as result:
+            assert result
+            estimates.append(throttler.estimated_time_to_capacity)
+            clock.now += DELAY
+
+    async with throttler.throttle():
+        waiter = asyncio.ensure_future(wait())
+        await asyncio.sleep(0)
+        estimates.append(throttler.estimated_time_to_capacity)
+        clock.now += DELAY
+    await waiter
+
+    assert estimates == [pytest.approx(2 * DELAY, rel=0.5), pytest.approx(DELAY, rel=0.5)]
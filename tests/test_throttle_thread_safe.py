@@ -0,0 +1,126 @@
+import asyncio
+import collections
+import threading
+import time
+
+import pytest
+
+from aio_throttle import MaxFractionCapacityQuota, Throttler, ThreadSafeThrottler
+
+DELAY = 0.01
+SUCCEED = "+"
+FAILED = "-"
+
+
+class Server:
+    def __init__(self, delay, throttler):
+        self.throttler = throttler
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def handle(self, consumer=None):
+        async with self.throttler.throttle(consumer=consumer) as result:
+            if not result:
+                return FAILED
+            with self.lock:
+                self.in_flight += 1
+                self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            await asyncio.sleep(self.delay)
+            with self.lock:
+                self.in_flight -= 1
+            return SUCCEED
+
+
+def test_throttler_is_not_bound_to_loop():
+    server = Server(DELAY, Throttler(1, 10))
+
+    async def run():
+        return await asyncio.gather(*[server.handle() for _ in range(0, 5)])
+
+    for _ in range(0, 2):
+        assert asyncio.run(run()) == [SUCCEED] * 5
+
+
+@pytest.mark.parametrize(
+    "capacity_limit, queue_limit, threads_count, tasks_count, succeed_count",
+    [(1, 1000, 2, 50, 100), (2, 1000, 4, 50, 200), (4, 1000, 8, 50, 400)],
+)
+def test_shared_between_loops(capacity_limit, queue_limit, threads_count, tasks_count, succeed_count):
+    server = Server(DELAY, ThreadSafeThrottler(capacity_limit, queue_limit))
+    statuses = []
+    barrier = threading.Barrier(threads_count)
+
+    async def run():
+        barrier.wait()
+        return await asyncio.gather(*[server.handle() for _ in range(0, tasks_count)])
+
+    def worker():
+        statuses.extend(asyncio.run(run()))
+
+    threads = [threading.Thread(target=worker) for _ in range(0, threads_count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    counter = collections.Counter(statuses)
+    assert counter[SUCCEED] == succeed_count
+    assert counter[FAILED] == threads_count * tasks_count - succeed_count
+    assert server.max_in_flight <= capacity_limit
+    assert server.throttler.stats.available_capacity == capacity_limit
+    assert server.throttler.stats.queue_size == 0
+
+
+def test_cancelled_waiters_pass_slots_on():
+    throttler = ThreadSafeThrottler(1, 10)
+
+    async def run():
+        async def hold():
+            async with throttler.throttle():
+                await asyncio.sleep(DELAY)
+
+        holder = asyncio.ensure_future(hold())
+        await asyncio.sleep(0)
+        waiters = [asyncio.ensure_future(hold()) for _ in range(0, 3)]
+        await asyncio.sleep(0)
+        waiters[-1].cancel()
+        await asyncio.gather(holder, *waiters, return_exceptions=True)
+
+    asyncio.run(run())
+
+    assert throttler.stats.available_capacity == 1
+    assert throttler.stats.queue_size == 0
+
+
+class SlowQuota(MaxFractionCapacityQuota[str]):
+    def can_be_accepted(self, resource, used_capacity, capacity_limit):
+        # gives other threads a chance to pass the check before the capacity is counted
+        time.sleep(0.0001)
+        return super().can_be_accepted(resource, used_capacity, capacity_limit)
+
+
+@pytest.mark.parametrize("threads_count, tasks_count", [(2, 50), (8, 50)])
+def test_consumer_quota_is_shared_between_loops(threads_count, tasks_count):
+    server = Server(DELAY, ThreadSafeThrottler(10, 1000, consumer_quotas=[SlowQuota(0.3)]))
+    statuses = []
+    barrier = threading.Barrier(threads_count)
+
+    async def run():
+        barrier.wait()
+        return await asyncio.gather(*[server.handle("consumer") for _ in range(0, tasks_count)])
+
+    def worker():
+        statuses.extend(asyncio.run(run()))
+
+    threads = [threading.Thread(target=worker) for _ in range(0, threads_count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert SUCCEED in statuses
+    assert server.max_in_flight <= 3
+    assert server.throttler.stats.consumers_used_capacity == {}
+    assert server.throttler.stats.available_capacity == 10
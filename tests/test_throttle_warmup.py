@@ -0,0 +1,80 @@
+import asyncio
+import contextlib
+
+import pytest
+
+from aio_throttle import MaxFractionCapacityQuota, Throttler, ThreadSafeThrottler, ThrottleResult
+
+
+async def _occupy(throttler, count):
+    stack = contextlib.AsyncExitStack()
+    results = [await stack.enter_async_context(throttler.throttle()) for _ in range(0, count)]
+    return stack, results
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("throttler_type", [Throttler, ThreadSafeThrottler])
+@pytest.mark.parametrize("elapsed, capacity_limit, queue_limit", [(0, 2, 4), (5, 6, 12), (10, 10, 20), (100, 10, 20)])
+async def test_linear_ramp(throttler_type, elapsed, capacity_limit, queue_limit, clock):
+    throttler = throttler_type(10, 20, warmup_duration=10, warmup_initial_fraction=0.2, clock=clock)
+
+    clock.now = elapsed
+    stack, results = await _occupy(throttler, capacity_limit)
+    async with stack:
+        assert results == [ThrottleResult.ACCEPTED] * capacity_limit
+        assert throttler.stats.capacity_limit == capacity_limit
+        assert throttler.stats.queue_limit == queue_limit
+        assert throttler.stats.available_capacity == 0
+
+
+@pytest.mark.asyncio
+async def test_quotas_use_effective_capacity(clock):
+    throttler = Throttler(
+        10, 0, [MaxFractionCapacityQuota(0.5)], warmup_duration=10, warmup_initial_fraction=0.4, clock=clock
+    )
+
+    async with throttler.throttle(consumer="consumer") as first_result:
+        async with throttler.throttle(consumer="consumer") as second_result:
+            async with throttler.throttle(consumer="consumer") as third_result:
+                assert first_result == second_result == ThrottleResult.ACCEPTED
+                assert third_result == ThrottleResult.REJECTED_DUE_TO_CONSUMER_QUOTA
+
+
+@pytest.mark.asyncio
+async def test_queued_waiters_are_woken_up_when_capacity_grows(clock):
+    throttler = Throttler(4, 4, warmup_duration=10, warmup_initial_fraction=0.25, clock=clock)
+
+    stack, _ = await _occupy(throttler, 1)
+    async with stack:
+
+        async def handle():
+            async with throttler.throttle() as result:
+                return result
+
+        waiter = asyncio.ensure_future(handle())
+        await asyncio.sleep(0)
+        assert throttler.stats.queue_size == 1
+
+        clock.now = 10
+        assert await handle() == ThrottleResult.ACCEPTED
+        assert await waiter == ThrottleResult.ACCEPTED
+
+
+@pytest.mark.asyncio
+async def test_ramp_is_paused_while_latency_is_high(clock):
+    throttler = Throttler(10, warmup_duration=10, warmup_initial_fraction=0.2, warmup_max_latency=0.5, clock=clock)
+
+    async with throttler.throttle():
+        clock.now = 1
+    assert throttler.stats.capacity_limit == 2
+
+    clock.now = 6
+    for _ in range(0, 10):
+        async with throttler.throttle():
+            pass
+    assert throttler.stats.capacity_limit == 2
+
+    clock.now = 11
+    async with throttler.throttle():
+        pass
+    assert throttler.stats.capacity_limit == 6
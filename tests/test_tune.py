@@ -0,0 +1,89 @@
+import io
+import json
+
+import pytest
+
+from aio_throttle import ThrottlePriority
+from aio_throttle.tune import TuneConfig, WaitHistogram, main, read_trace, replay, tune
+
+
+def _trace(*records):
+    return io.StringIO("\n".join(json.dumps(record) for record in records))
+
+
+def test_read_trace():
+    records = list(read_trace(_trace({"arrival_time": 1.5, "duration": 0.5, "consumer": "a", "priority": "low"})))
+    assert [(1.5, "a", ThrottlePriority.LOW, 0.5)] == records
+
+
+@pytest.mark.parametrize(
+    "capacity_limit, queue_limit, accepted, rejected, duration, wait",
+    [(1, 0, 1, 3, 1, 0), (2, 0, 2, 2, 1, 0), (2, 2, 4, 0, 2, 1), (4, 0, 4, 0, 1, 0)],
+)
+def test_replay_in_simulated_time(capacity_limit, queue_limit, accepted, rejected, duration, wait):
+    trace = _trace(*[{"arrival_time": 10, "duration": 1} for _ in range(0, 4)])
+
+    result = replay(read_trace(trace), TuneConfig(capacity_limit, queue_limit, 1, 1), 99)
+
+    assert (result.accepted, result.rejected) == (accepted, rejected)
+    assert result.duration == pytest.approx(duration)
+    assert result.wait_percentile == pytest.approx(wait, rel=0.05)
+
+
+def test_replay_spreads_arrivals():
+    trace = _trace(*[{"arrival_time": x, "duration": 0.5} for x in range(0, 100)])
+
+    result = replay(read_trace(trace), TuneConfig(1, 0, 1, 1), 99)
+
+    assert (result.accepted, result.rejected) == (100, 0)
+    assert result.duration == pytest.approx(99.5)
+
+
+def test_replay_slows_down_past_saturation():
+    trace = _trace(*[{"arrival_time": 0, "duration": 1} for _ in range(0, 4)])
+
+    result = replay(read_trace(trace), TuneConfig(4, 0, 1, 1), 99, saturation_concurrency=2)
+
+    assert (result.accepted, result.rejected) == (4, 0)
+    assert result.duration == pytest.approx(2)
+
+
+@pytest.mark.parametrize("saturation_concurrency, capacity_limit", [(None, 4), (1, 1), (2, 2)])
+def test_tune_picks_smallest_config_with_best_goodput(saturation_concurrency, capacity_limit):
+    records = [{"arrival_time": 0, "duration": 1} for _ in range(0, 4)]
+    configs = [TuneConfig(capacity_limit, 0, 1, 1) for capacity_limit in [1, 2, 4]]
+
+    best, results = tune(lambda: _trace(*records), configs, 99, 0.5, saturation_concurrency)
+
+    assert len(results) == 3
+    assert best.config.capacity_limit == capacity_limit
+
+
+def test_wait_histogram():
+    histogram = WaitHistogram()
+    for wait in [0] * 90 + [0.01] * 9 + [1]:
+        histogram.add(wait)
+
+    assert histogram.percentile(50) == 0
+    assert histogram.percentile(99) == pytest.approx(0.01, rel=0.05)
+    assert histogram.percentile(100) == pytest.approx(1, rel=0.05)
+
+
+def test_main(tmp_path, capsys):
+    path = tmp_path / "trace.jsonl"
+    path.write_text(_trace(*[{"arrival_time": 0, "duration": 1, "consumer": "a"} for _ in range(0, 4)]).getvalue())
+
+    assert 0 == main([str(path), "--capacity-limits", "1,2", "--queue-limits", "0,2", "--max-wait", "0.5"])
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 2 * 2 * 3 * 2 + 1
+    assert lines[-1].startswith("best: capacity_limit=2 queue_limit=0 consumer_fraction=1 ")
+
+    assert 0 == main(
+        [str(path), "--capacity-limits", "1,2", "--queue-limits", "0,2", "--max-wait", "0.5"]
+        + ["--saturation-concurrency", "1"]
+    )
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[-1].startswith("best: capacity_limit=1 queue_limit=0 consumer_fraction=1 priority_fraction=1 ")
+
+    args = ["--capacity-limits", "1", "--queue-limits", "2", "--consumer-fractions", "1", "--priority-fractions", "1"]
+    assert 1 == main([str(path), *args, "--max-wait", "0.5"])